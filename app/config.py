@@ -0,0 +1,104 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+MODELS_DIR = os.getenv("MODELS_DIR", "pretrained_models")
+FINGERPRINT_ENCODER_PATH = os.getenv("FINGERPRINT_ENCODER_PATH", os.path.join("pretrained_models", "128_encoder.pth"))
+FINGERPRINT_DECODER_PATH = os.getenv("FINGERPRINT_DECODER_PATH", os.path.join("pretrained_models", "128_decoder.pth"))
+# Pakai <nama>.serving (hasil serving_artifact.py) sebagai pengganti <nama>.pkl jika ada
+PREFER_SERVING_ARTIFACTS = os.getenv("PREFER_SERVING_ARTIFACTS", "1") == "1"
+
+# Katalog metadata model, di-refresh inkremental paling cepat setiap interval (detik)
+MODEL_CATALOG_PATH = os.getenv("MODEL_CATALOG_PATH", os.path.join("cache", "model_catalog.json"))
+MODEL_CATALOG_REFRESH_INTERVAL = _env_float("MODEL_CATALOG_REFRESH_INTERVAL", 5.0)
+
+# Cache model StyleGAN2 (G_ema) yang tetap berada di memori
+MODEL_CACHE_MAX_MODELS = _env_int("MODEL_CACHE_MAX_MODELS", 4)
+MODEL_CACHE_MAX_BYTES = _env_int("MODEL_CACHE_MAX_BYTES", 2 * 1024 ** 3)
+
+# Micro-batching request /api/generator/generate
+GENERATOR_MAX_BATCH_SIZE = _env_int("GENERATOR_MAX_BATCH_SIZE", 8)
+GENERATOR_MAX_BATCH_WAIT_MS = _env_float("GENERATOR_MAX_BATCH_WAIT_MS", 10.0)
+
+# Eksekusi inferensi di luar event loop; 0 thread intra-op = jumlah core dibagi jumlah worker
+INFERENCE_WORKERS = max(1, _env_int("INFERENCE_WORKERS", 2))
+INFERENCE_INTRA_OP_THREADS = _env_int("INFERENCE_INTRA_OP_THREADS", 0)
+
+# Batas jumlah frame animasi interpolasi per request
+ANIMATION_MAX_FRAMES = _env_int("ANIMATION_MAX_FRAMES", 2000)
+
+# Batas jumlah seed untuk satu grid
+GRID_MAX_SEEDS = _env_int("GRID_MAX_SEEDS", 256)
+
+# Encoding gambar output di thread pool terpisah; IMAGE_FORMAT = png, webp (lossless) atau jpeg
+ENCODE_WORKERS = max(1, _env_int("ENCODE_WORKERS", os.cpu_count() or 1))
+PNG_COMPRESS_LEVEL = _env_int("PNG_COMPRESS_LEVEL", 6)
+JPEG_QUALITY = _env_int("JPEG_QUALITY", 90)
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "png")
+# Output fingerprinting selalu lossless: png atau webp
+FINGERPRINT_IMAGE_FORMAT = os.getenv("FINGERPRINT_IMAGE_FORMAT", "png")
+# Jumlah batch embed-batch yang boleh masih di-encode selagi batch berikutnya diinferensi
+ENCODE_PIPELINE_BATCHES = max(1, _env_int("ENCODE_PIPELINE_BATCHES", 2))
+
+# Ukuran batch encoder/decoder fingerprint untuk embed-batch dan decode-batch
+FINGERPRINT_BATCH_SIZE = max(1, _env_int("FINGERPRINT_BATCH_SIZE", 64))
+
+# Decode gambar input fingerprinting di thread pool, maksimal DECODE_PREFETCH_BATCHES batch di depan inferensi
+DECODE_WORKERS = max(1, _env_int("DECODE_WORKERS", os.cpu_count() or 1))
+DECODE_PREFETCH_BATCHES = max(1, _env_int("DECODE_PREFETCH_BATCHES", 2))
+
+# Batas arsip zip yang diunggah, diperiksa sebelum ada member yang didekompresi
+ZIP_MAX_MEMBERS = _env_int("ZIP_MAX_MEMBERS", 10000)
+ZIP_MAX_MEMBER_BYTES = _env_int("ZIP_MAX_MEMBER_BYTES", 64 * 1024 ** 2)
+ZIP_MAX_TOTAL_BYTES = _env_int("ZIP_MAX_TOTAL_BYTES", 2 * 1024 ** 3)
+ZIP_MAX_COMPRESSION_RATIO = _env_float("ZIP_MAX_COMPRESSION_RATIO", 100.0)
+
+# Pool proses inferensi (0 = nonaktif, inferensi di thread pool proses utama).
+# Setiap worker dipin ke WORKER_CORES core (0 = dibagi rata) dan memakai jumlah thread torch yang sama.
+WORKER_PROCESSES = _env_int("WORKER_PROCESSES", 0)
+WORKER_CORES = _env_int("WORKER_CORES", 0)
+
+# Cache W latent hasil mapping network per (model, seed, truncation_psi, label)
+W_CACHE_MAX_ENTRIES = _env_int("W_CACHE_MAX_ENTRIES", 4096)
+
+# Cache hasil generate (content-addressed) untuk seed yang sama; TTL 0 = tanpa kedaluwarsa
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join("static", "images", "GAN", "cache"))
+RESULT_CACHE_MAX_BYTES = _env_int("RESULT_CACHE_MAX_BYTES", 1024 ** 3)
+RESULT_CACHE_TTL = _env_float("RESULT_CACHE_TTL", 7 * 24 * 3600)
+
+# Warm-up saat startup; daftar dipisahkan koma, WARMUP_MODELS kosong = semua model
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_MODELS = [m for m in os.getenv("WARMUP_MODELS", "").split(",") if m]
+WARMUP_BATCH_SIZES = [int(b) for b in os.getenv("WARMUP_BATCH_SIZES", f"1,{GENERATOR_MAX_BATCH_SIZE}").split(",") if b]
+WARMUP_FINGERPRINT_BATCH_SIZES = [int(b) for b in os.getenv("WARMUP_FINGERPRINT_BATCH_SIZES", "1,64").split(",") if b]
+WARMUP_MAX_ITERATIONS = _env_int("WARMUP_MAX_ITERATIONS", 10)
+# Latensi dianggap stabil jika perubahan antar iterasi di bawah toleransi ini
+WARMUP_STEADY_TOLERANCE = _env_float("WARMUP_STEADY_TOLERANCE", 0.1)
+# Langkah warm-up yang gagal diulang dengan jeda WARMUP_RETRY_BACKOFF * 2^percobaan detik
+WARMUP_RETRIES = _env_int("WARMUP_RETRIES", 2)
+WARMUP_RETRY_BACKOFF = _env_float("WARMUP_RETRY_BACKOFF", 1.0)
+
+# Kompilasi synthesis network dengan TorchScript trace saat model dimuat (opsional)
+COMPILE_ENABLED = os.getenv("COMPILE_ENABLED", "0") == "1"
+COMPILE_BATCH_SIZES = [int(b) for b in os.getenv("COMPILE_BATCH_SIZES", f"1,{GENERATOR_MAX_BATCH_SIZE}").split(",") if b]
+COMPILE_CACHE_DIR = os.getenv("COMPILE_CACHE_DIR", os.path.join("cache", "compiled"))
+
+# Bobot model di-memory-map agar beberapa worker uvicorn berbagi satu salinan fisik (hanya CPU).
+# File .pkl dikonversi sekali ke serving artifact di MMAP_ARTIFACT_DIR, lalu di-mmap oleh setiap worker.
+MMAP_WEIGHTS = os.getenv("MMAP_WEIGHTS", "1") == "1"
+MMAP_ARTIFACT_DIR = os.getenv("MMAP_ARTIFACT_DIR", os.path.join("cache", "serving"))
+
+# Presisi inferensi generator: fp32, bf16 (autocast) atau int8 (mapping network dikuantisasi).
+# Per model lewat MODEL_PRECISIONS, misalnya "ffhq=bf16,cat=int8" (nama model tanpa ekstensi).
+INFERENCE_PRECISION = os.getenv("INFERENCE_PRECISION", "fp32")
+MODEL_PRECISIONS = dict(
+    item.split("=", 1) for item in os.getenv("MODEL_PRECISIONS", "").split(",") if "=" in item
+)
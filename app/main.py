@@ -1,8 +1,11 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import generator, fingerprinting
+from app.routers import generator, fingerprinting, health
+from app.services.warmup import run_warmup
+from app.services.worker_pool import worker_pool
 
 app = FastAPI(
     title="StyleGAN2 Generator API",
@@ -22,6 +25,18 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.include_router(generator.router)
 app.include_router(fingerprinting.router)
+app.include_router(health.router)
+
+@app.on_event("startup")
+async def start_warmup():
+    # Dijalankan di background agar /health/live tetap bisa diakses selama warm-up
+    worker_pool.start()
+    app.state.warmup_task = asyncio.create_task(run_warmup())
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    worker_pool.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
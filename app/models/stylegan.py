@@ -1,57 +1,533 @@
 import os
+import uuid
+import asyncio
+import shutil
 import numpy as np
-import PIL.Image
 import torch
 import dnnlib
 import legacy
+import serving_artifact
+from dataclasses import dataclass, field
 from typing import Optional
 
-MODELS_DIR = "pretrained_models"
+from app import config
+from app.services.model_cache import ModelCache
+from app.services.model_catalog import ModelCatalog
+from app.services.batcher import MicroBatcher
+from app.services.executor import run_inference
+from app.services.worker_pool import run_in_worker, in_worker
+from app.services.result_cache import ResultCache
+from app.services.compiler import compile_synthesis
+from app.services.precision import apply_precision, model_precision, precision_context
+from app.utils.lru import LRUCache
+from app.utils.image import read_bytes
+from app.services.encoder import image_encoder, extension
+
+MODELS_DIR = config.MODELS_DIR
+MODEL_EXTENSIONS = (".pkl", serving_artifact.SERVING_SUFFIX)
+DEFAULT_TRUNCATION_PSI = 0.7
+FULL_SIZE = "full"
+
+def _mmap_artifact_path(model_path):
+    """Mengonversi .pkl sekali ke serving artifact bersama agar bobotnya bisa di-mmap oleh semua worker
+
+    Mengembalikan None jika konversi gagal (misalnya direktori cache tidak bisa ditulis).
+    """
+    model_hash = model_cache.model_hash(model_path)
+    artifact_path = os.path.join(config.MMAP_ARTIFACT_DIR, model_hash + serving_artifact.SERVING_SUFFIX)
+    if serving_artifact.is_serving_artifact(artifact_path):
+        return artifact_path
+
+    with dnnlib.util.open_url(model_path) as f:
+        G = legacy.load_network_pkl(f, keys=['G_ema'])['G_ema']
+
+    tmp_path = f"{artifact_path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(config.MMAP_ARTIFACT_DIR, exist_ok=True)
+        serving_artifact.save_generator(G, tmp_path)
+    except Exception as e:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        print(f"Konversi {model_path} ke serving artifact gagal, memuat pickle tanpa mmap: {str(e)}")
+        return None
+
+    try:
+        os.rename(tmp_path, artifact_path)
+    except OSError:
+        # Worker lain sudah lebih dulu menyelesaikan konversi
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return artifact_path
 
 def load_model(model_path):
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    
-    with dnnlib.util.open_url(model_path) as f:
-        G = legacy.load_network_pkl(f)['G_ema'].to(device)
+
+    weights_path = model_path
+    if config.MMAP_WEIGHTS and device.type == 'cpu' and not serving_artifact.is_serving_artifact(model_path):
+        # None jika konversi gagal; model tetap dimuat dari pickle
+        weights_path = _mmap_artifact_path(model_path) or model_path
+
+    if serving_artifact.is_serving_artifact(weights_path):
+        G = serving_artifact.load_generator(weights_path, device=device)
+    else:
+        with dnnlib.util.open_url(model_path) as f:
+            G = legacy.load_network_pkl(f, keys=['G_ema'])['G_ema'].to(device)
+
+    precision = model_precision(model_path)
+    apply_precision(G, precision)
+
+    # Trace TorchScript dibuat dalam fp32, jadi tidak dipakai untuk model bf16
+    G.compiled_synthesis = None
+    if config.COMPILE_ENABLED and precision != "bf16":
+        G.compiled_synthesis = compile_synthesis(
+            G,
+            model_hash=model_cache.model_hash(model_path),
+            batch_sizes=config.COMPILE_BATCH_SIZES,
+            cache_dir=config.COMPILE_CACHE_DIR
+        )
     
     return G
 
+model_cache = ModelCache(
+    loader=load_model,
+    max_models=config.MODEL_CACHE_MAX_MODELS,
+    max_bytes=config.MODEL_CACHE_MAX_BYTES
+)
+
+def list_model_names():
+    if not os.path.exists(MODELS_DIR):
+        raise FileNotFoundError("Direktori model tidak ditemukan")
+    return sorted(f for f in os.listdir(MODELS_DIR) if f.endswith(MODEL_EXTENSIONS))
+
+def resolve_model_path(model_name: str):
+    """Memakai serving artifact hasil konversi jika tersedia di samping file .pkl"""
+    model_path = os.path.join(MODELS_DIR, model_name)
+    if config.PREFER_SERVING_ARTIFACTS and model_name.endswith(".pkl"):
+        artifact_path = os.path.splitext(model_path)[0] + serving_artifact.SERVING_SUFFIX
+        if serving_artifact.is_serving_artifact(artifact_path):
+            return artifact_path
+    return model_path
+
+model_catalog = ModelCatalog(
+    models_dir=MODELS_DIR,
+    index_path=config.MODEL_CATALOG_PATH,
+    extensions=MODEL_EXTENSIONS,
+    hasher=model_cache.model_hash,
+    refresh_interval=config.MODEL_CATALOG_REFRESH_INTERVAL
+)
+
+def get_model_entry(model_name: str):
+    entry = model_cache.get(resolve_model_path(model_name))
+    # Worker tidak menulis indeks katalog; biaya load dicatat dari proses utama saja
+    if not in_worker():
+        model_catalog.record_load(model_name, entry.load_time)
+    return entry
+
+def get_model(model_name: str):
+    return get_model_entry(model_name).model
+
+w_cache = LRUCache(max_entries=config.W_CACHE_MAX_ENTRIES)
+
+def _label_index(G):
+    # Model kondisional selalu memakai kelas 0
+    return 0 if G.c_dim != 0 else None
+
+def seeds_to_z(G, seeds: list[int]):
+    z = np.stack([np.random.RandomState(seed).randn(G.z_dim) for seed in seeds])
+    return torch.from_numpy(z)
+
+def map_z(G, z: torch.Tensor, truncation_psi: float = DEFAULT_TRUNCATION_PSI):
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    z = z.to(device)
+
+    label = None
+    class_idx = _label_index(G)
+    if class_idx is not None:
+        label = torch.zeros([z.shape[0], G.c_dim], device=device)
+        label[:, class_idx] = 1
+
+    with torch.no_grad(), precision_context(G):
+        ws = G.mapping(z, label, truncation_psi=truncation_psi)
+    return ws.float()
+
+def map_latents(G, seeds: list[int], truncation_psi: float = DEFAULT_TRUNCATION_PSI):
+    return map_z(G, seeds_to_z(G, seeds), truncation_psi=truncation_psi)
+
+def synthesize_raw(G, ws: torch.Tensor, noise_mode: str = 'const'):
+    """Output synthesis network apa adanya: tensor float [N, C, H, W] dengan rentang [-1, 1]"""
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+    synthesis = getattr(G, 'compiled_synthesis', None) or G.synthesis
+    with torch.no_grad(), precision_context(G):
+        img = synthesis(ws.to(device), noise_mode=noise_mode)
+    return img.float()
+
+def to_uint8(img: torch.Tensor):
+    return (img.permute(0, 2, 3, 1) * 127.5 + 128).clamp(0, 255).to(torch.uint8)
+
+def synthesize(G, ws: torch.Tensor, noise_mode: str = 'const'):
+    return to_uint8(synthesize_raw(G, ws, noise_mode=noise_mode)).cpu().numpy()
+
+def resize_images(img: torch.Tensor, size: int):
+    """Mengecilkan batch gambar float [N, C, H, W] menjadi size x size sebelum dikonversi ke uint8"""
+    if img.shape[-1] == size and img.shape[-2] == size:
+        return img
+    return torch.nn.functional.interpolate(img, size=(size, size), mode='area')
+
+def get_latents(model_name: str, seeds: list[int], truncation_psi: float = DEFAULT_TRUNCATION_PSI):
+    """Mengambil W latent dari cache, hanya menjalankan mapping network untuk seed yang belum ada"""
+    entry = get_model_entry(model_name)
+    G = entry.model
+    class_idx = _label_index(G)
+
+    keys = [(entry.model_hash, seed, truncation_psi, class_idx) for seed in seeds]
+    ws = [w_cache.get(key) for key in keys]
+
+    missing = [i for i, w in enumerate(ws) if w is None]
+    if missing:
+        mapped = map_latents(G, [seeds[i] for i in missing], truncation_psi=truncation_psi).cpu()
+        for i, w in zip(missing, mapped):
+            w_cache.put(keys[i], w)
+            ws[i] = w
+
+    return torch.stack(ws)
+
+def render_batch(G, seeds: list[int], truncation_psi: float = DEFAULT_TRUNCATION_PSI, noise_mode: str = 'const'):
+    return synthesize(G, map_latents(G, seeds, truncation_psi=truncation_psi), noise_mode=noise_mode)
+
+def warmup_model(model_name: str, batch_size: int = 1):
+    G = get_model(model_name)
+    render_batch(G, list(range(batch_size)))
+
+def normalize_sizes(sizes) -> tuple:
+    """Menyeragamkan daftar ukuran output menjadi label unik, misalnya ("full", "256")"""
+    labels = []
+    for size in sizes or [FULL_SIZE]:
+        label = str(size).lower()
+        if label != FULL_SIZE and (not label.isdigit() or int(label) < 1):
+            raise ValueError(f"Ukuran output tidak valid: {size}")
+        if label not in labels:
+            labels.append(label)
+    return tuple(labels)
+
+def _generate_batch_sync(model_name: str, seeds: list[int], truncation_psi: float, sizes: Optional[list] = None):
+    """Satu synthesis untuk semua seed; sizes[i] berisi label ukuran yang diminta untuk seed ke-i"""
+    G = get_model(model_name)
+    sizes = sizes or [(FULL_SIZE,)] * len(seeds)
+
+    print(f'Generating {len(seeds)} image(s) for seeds {seeds} with truncation_psi={truncation_psi}...')
+    ws = get_latents(model_name, seeds, truncation_psi=truncation_psi)
+    img = synthesize_raw(G, ws)
+
+    # Setiap ukuran diturunkan dari tensor float yang sama, hanya untuk baris yang memintanya
+    results = [{} for _ in seeds]
+    labels = list(dict.fromkeys(label for labels in sizes for label in labels))
+    for label in labels:
+        rows = [i for i, requested in enumerate(sizes) if label in requested]
+        size = G.img_resolution if label == FULL_SIZE else min(int(label), G.img_resolution)
+        resized = to_uint8(resize_images(img[rows], size)).cpu().numpy()
+        for i, row in zip(rows, resized):
+            results[i][label] = row
+    return results
+
+async def _generate_batch(key, items: list[tuple]):
+    # Ukuran yang diminta tidak menjadi bagian key agar request dengan ukuran berbeda tetap satu batch
+    model_name, truncation_psi = key
+    seeds = [seed for seed, _ in items]
+    sizes = [labels for _, labels in items]
+    return await run_in_worker(_generate_batch_sync, model_name, seeds, truncation_psi, sizes)
+
+def validate_latents(G, ws):
+    ws = torch.as_tensor(ws, dtype=torch.float32)
+    if ws.ndim == 1:
+        ws = ws.unsqueeze(0)
+    if ws.ndim == 2 and ws.shape[0] == 1:
+        ws = ws.repeat([G.num_ws, 1])
+    if ws.ndim == 2:
+        ws = ws.unsqueeze(0)
+    if ws.ndim != 3 or tuple(ws.shape[1:]) != (G.num_ws, G.w_dim):
+        raise ValueError(
+            f"Bentuk W latent tidak valid: {list(ws.shape)}, "
+            f"diharapkan [{G.w_dim}] atau [{G.num_ws}, {G.w_dim}]"
+        )
+    return ws
+
+def _generate_from_latents_sync(model_name: str, ws):
+    G = get_model(model_name)
+    return list(synthesize(G, validate_latents(G, ws)))
+
+result_cache = ResultCache(
+    root_dir=config.RESULT_CACHE_DIR,
+    max_bytes=config.RESULT_CACHE_MAX_BYTES,
+    ttl=config.RESULT_CACHE_TTL
+)
+
+# Key cache hasil -> future path file, untuk render yang sedang berjalan
+_inflight: dict = {}
+
+batcher = MicroBatcher(
+    _generate_batch,
+    max_batch_size=config.GENERATOR_MAX_BATCH_SIZE,
+    max_wait=config.GENERATOR_MAX_BATCH_WAIT_MS / 1000
+)
+
+@dataclass
+class GeneratedImage:
+    seed: int
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+    cached: bool = False
+    size: str = FULL_SIZE
+    format: str = "png"
+    # Semua ukuran yang diminta (termasuk ukuran pertama), berdasarkan label ukuran
+    variants: dict = field(default_factory=dict)
+
+def write_bytes(data: bytes, save_path: str):
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    with open(save_path, "wb") as f:
+        f.write(data)
+    return save_path
+
 async def generate_image(
     model_name: str, 
     seed: Optional[int] = None, 
     # truncation_psi: float = 0.7, 
-    save_path: str = "output.png"
-):
+    save_path: Optional[str] = None,
+    return_bytes: bool = False,
+    persist: bool = True,
+    sizes: Optional[list] = None,
+    image_format: Optional[str] = None
+) -> GeneratedImage:
+    """Generate satu seed dalam satu atau beberapa ukuran; path dan data hasil mengacu ke ukuran pertama"""
     try:
-        truncation_psi = 0.7  # Default value, can be adjusted as needed
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        
-        model_path = os.path.join(MODELS_DIR, model_name)
-        G = load_model(model_path)
+        truncation_psi = DEFAULT_TRUNCATION_PSI
+        sizes = normalize_sizes(sizes)
+        image_format = image_format or config.IMAGE_FORMAT
+        ext = extension(image_format)
         
         if seed is None:
             seed = np.random.randint(0, 2**32 - 1)
-        
-        z = torch.from_numpy(np.random.RandomState(seed).randn(1, G.z_dim)).to(device)
-        
-        label = None
-        if G.c_dim != 0:
-            label = torch.zeros([1, G.c_dim], device=device)
-            label[:, 0] = 1
+        seed = int(seed)
 
-        noise_mode = 'const'
-        
-        print(f'Generating image for seed {seed} with truncation_psi={truncation_psi}...')
-        img = G(z, label, truncation_psi=truncation_psi, noise_mode=noise_mode)
-        
-        img = (img.permute(0, 2, 3, 1) * 127.5 + 128).clamp(0, 255).to(torch.uint8)
-        img = img[0].cpu().numpy()
-        
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        PIL.Image.fromarray(img, 'RGB').save(save_path)
-        
-        return save_path
+        # Dengan noise_mode='const' hasilnya deterministik, jadi bisa diambil dari cache
+        variants = {}
+        cache_keys = {}
+        if config.RESULT_CACHE_ENABLED:
+            model_hash = await run_inference(model_cache.model_hash, resolve_model_path(model_name))
+            precision = model_precision(model_name)
+            for label in sizes:
+                cache_keys[label] = result_cache.make_key(model_hash, precision, seed, truncation_psi, label, ext)
+                cached_path = result_cache.get(cache_keys[label])
+                if cached_path is not None:
+                    data = await run_inference(read_bytes, cached_path) if return_bytes else None
+                    variants[label] = GeneratedImage(
+                        seed=seed, path=cached_path, data=data, cached=True, size=label, format=image_format
+                    )
+
+        missing = tuple(label for label in sizes if label not in variants)
+
+        # Request bersamaan untuk key cache yang sama menunggu render yang sedang berjalan
+        shared = persist and bool(cache_keys)
+        waiting = {
+            label: _inflight[cache_keys[label]]
+            for label in missing if shared and cache_keys[label] in _inflight
+        }
+        render = tuple(label for label in missing if label not in waiting)
+        owned = {}
+        if shared:
+            loop = asyncio.get_running_loop()
+            for label in render:
+                owned[label] = _inflight[cache_keys[label]] = loop.create_future()
+
+        try:
+            if render:
+                images = await batcher.submit((model_name, truncation_psi), (seed, render))
+                encoded = await image_encoder.encode_batch_async([images[label] for label in render], image_format)
+
+                for label, data in zip(render, encoded):
+                    if not persist:
+                        variants[label] = GeneratedImage(seed=seed, data=data, size=label, format=image_format)
+                        continue
+
+                    if label in cache_keys:
+                        path = await run_inference(result_cache.put, cache_keys[label], data, ext)
+                    else:
+                        path = save_path if save_path is not None and label == sizes[0] else None
+                        if path is None:
+                            suffix = "" if label == FULL_SIZE else f"_{label}"
+                            path = os.path.join("static", "images", "GAN", f"{uuid.uuid4()}{suffix}.{ext}")
+                        await run_inference(write_bytes, data, path)
+                    variants[label] = GeneratedImage(
+                        seed=seed, path=path, data=data if return_bytes else None, size=label, format=image_format
+                    )
+                    if label in owned:
+                        owned[label].set_result(path)
+        except BaseException as e:
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Ditandai sudah diambil agar tidak muncul peringatan jika tidak ada yang menunggu
+                    future.exception()
+            raise
+        finally:
+            for label in owned:
+                _inflight.pop(cache_keys[label], None)
+
+        for label, future in waiting.items():
+            # shield: request yang dibatalkan tidak ikut membatalkan render milik request lain
+            path = await asyncio.shield(future)
+            data = await run_inference(read_bytes, path) if return_bytes else None
+            variants[label] = GeneratedImage(
+                seed=seed, path=path, data=data, cached=True, size=label, format=image_format
+            )
+
+        first = variants[sizes[0]]
+        return GeneratedImage(
+            seed=seed,
+            path=first.path,
+            data=first.data,
+            cached=all(variants[label].cached for label in sizes),
+            size=first.size,
+            format=image_format,
+            variants={label: variants[label] for label in sizes}
+        )
     
     except Exception as e:
         print(f"Error generating image: {str(e)}")
-        raise e
\ No newline at end of file
+        raise e
+
+async def fetch_latents(
+    model_name: str,
+    seed: Optional[int] = None,
+    truncation_psi: float = DEFAULT_TRUNCATION_PSI
+):
+    if seed is None:
+        seed = np.random.randint(0, 2**32 - 1)
+
+    ws = await run_in_worker(get_latents, model_name, [int(seed)], truncation_psi)
+    return int(seed), ws[0].tolist()
+
+async def generate_image_from_latents(
+    model_name: str,
+    ws: list,
+    save_path: str = "output.png"
+):
+    try:
+        images = await run_in_worker(_generate_from_latents_sync, model_name, ws)
+        data = await image_encoder.encode_async(images[0], "png")
+        await run_inference(write_bytes, data, save_path)
+
+        return save_path
+
+    except Exception as e:
+        print(f"Error generating image from latents: {str(e)}")
+        raise e
+
+def slerp(a: torch.Tensor, b: torch.Tensor, t: torch.Tensor):
+    """Interpolasi sferis antar vektor Z (baris per baris)"""
+    a_norm = a / a.norm(dim=-1, keepdim=True)
+    b_norm = b / b.norm(dim=-1, keepdim=True)
+    omega = torch.acos((a_norm * b_norm).sum(-1, keepdim=True).clamp(-1, 1))
+    sin_omega = torch.sin(omega)
+    lerp = (1 - t) * a + t * b
+    spherical = (torch.sin((1 - t) * omega) * a + torch.sin(t * omega) * b) / sin_omega.clamp_min(1e-8)
+    # Vektor yang (hampir) searah cukup diinterpolasi linear
+    return torch.where(sin_omega > 1e-6, spherical, lerp)
+
+def interpolation_frame_count(num_seeds: int, frames_per_transition: int, loop: bool = True) -> int:
+    """Jumlah frame yang akan dihasilkan interpolation_steps, tanpa membangun daftarnya"""
+    if loop:
+        return num_seeds * frames_per_transition
+    return (num_seeds - 1) * frames_per_transition + 1
+
+def interpolation_steps(num_seeds: int, frames_per_transition: int, loop: bool = True):
+    """Daftar (indeks seed awal, indeks seed tujuan, t) untuk setiap frame"""
+    transitions = num_seeds if loop else num_seeds - 1
+    steps = [
+        (k, (k + 1) % num_seeds, f / frames_per_transition)
+        for k in range(transitions)
+        for f in range(frames_per_transition)
+    ]
+    if not loop:
+        steps.append((num_seeds - 1, num_seeds - 1, 0.0))
+    return steps
+
+def interpolation_keyframes(model_name: str, seeds: list[int], space: str, truncation_psi: float):
+    """Latent untuk setiap seed: Z untuk space 'z', W (lewat cache) untuk space 'w'"""
+    G = get_model(model_name)
+    if space == 'z':
+        return seeds_to_z(G, seeds)
+    return get_latents(model_name, seeds, truncation_psi=truncation_psi)
+
+def _render_interpolation_sync(model_name: str, keyframes: torch.Tensor, steps: list, space: str, truncation_psi: float):
+    G = get_model(model_name)
+    src = keyframes[[i for i, _, _ in steps]]
+    dst = keyframes[[j for _, j, _ in steps]]
+    t = torch.tensor([t for _, _, t in steps], dtype=keyframes.dtype)
+
+    if space == 'z':
+        ws = map_z(G, slerp(src, dst, t[:, None]), truncation_psi=truncation_psi)
+    else:
+        ws = torch.lerp(src, dst, t[:, None, None])
+    return list(synthesize(G, ws))
+
+def _encode_frames(writer, images: list) -> bytes:
+    return b"".join(writer.add_frame(img) for img in images)
+
+async def stream_interpolation(
+    model_name: str,
+    keyframes: torch.Tensor,
+    steps: list,
+    space: str,
+    truncation_psi: float,
+    writer
+):
+    """Render frame per batch dan langsung mengirim hasil encode-nya, memori tidak tergantung jumlah frame"""
+    batch_size = config.GENERATOR_MAX_BATCH_SIZE
+    for start in range(0, len(steps), batch_size):
+        images = await run_in_worker(
+            _render_interpolation_sync, model_name, keyframes, steps[start:start + batch_size], space, truncation_psi
+        )
+        chunk = await run_inference(_encode_frames, writer, images)
+        if chunk:
+            yield chunk
+
+    yield await run_inference(writer.close)
+
+def _render_grid_chunk_sync(model_name: str, seeds: list[int], truncation_psi: float, thumbnail_size: Optional[int]):
+    G = get_model(model_name)
+    img = synthesize_raw(G, get_latents(model_name, seeds, truncation_psi=truncation_psi))
+    thumbnails = to_uint8(resize_images(img, thumbnail_size)).cpu() if thumbnail_size else None
+    return to_uint8(img).cpu(), thumbnails
+
+def tile_grid(tiles: torch.Tensor, columns: int):
+    """Menyusun tensor uint8 [rows * columns, H, W, C] menjadi satu gambar grid [rows * H, columns * W, C]"""
+    count, height, width, channels = tiles.shape
+    rows = count // columns
+    return tiles.view(rows, columns, height, width, channels).permute(0, 2, 1, 3, 4).reshape(
+        rows * height, columns * width, channels
+    )
+
+async def render_grid(
+    model_name: str,
+    seeds: list[int],
+    columns: int,
+    truncation_psi: float = DEFAULT_TRUNCATION_PSI,
+    thumbnail_size: Optional[int] = None
+):
+    """Render seed per batch langsung ke tensor grid; mengembalikan (grid, daftar thumbnail atau None)"""
+    rows = -(-len(seeds) // columns)
+    tiles = None
+    thumbnails = [] if thumbnail_size else None
+
+    batch_size = config.GENERATOR_MAX_BATCH_SIZE
+    for start in range(0, len(seeds), batch_size):
+        images, thumbs = await run_in_worker(
+            _render_grid_chunk_sync, model_name, seeds[start:start + batch_size], truncation_psi, thumbnail_size
+        )
+        if tiles is None:
+            # Sel kosong di baris terakhir dibiarkan hitam
+            tiles = torch.zeros([rows * columns, *images.shape[1:]], dtype=torch.uint8)
+        tiles[start:start + len(images)] = images
+        if thumbs is not None:
+            thumbnails.extend(thumbs.numpy())
+
+    return tile_grid(tiles, columns).numpy(), thumbnails
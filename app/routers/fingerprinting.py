@@ -1,49 +1,186 @@
 from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import StreamingResponse, JSONResponse
-from io import BytesIO
+from typing import Optional
+from io import BytesIO, StringIO
 import uuid
 import os
+import csv
+import json
+import shutil
+import itertools
 import tempfile
 
-from app.services.fingerprinting import FingerprintService
+from app import config
+from app.services import fingerprinting
 from app.utils.zip_processor import ZipImageProcessor
-from app.utils.response import success_response, error_response
-from app.utils.bitwise_accuracy import bitwise_accuracy
-
-fp_service = FingerprintService(
-    encoder_path="pretrained_models/128_encoder.pth",
-    decoder_path="pretrained_models/128_decoder.pth"
+from app.utils.response import (
+    success_response, error_response, image_response, multipart_response, RESPONSE_MODES
 )
+from app.utils.image import read_bytes
+from app.utils.bitwise_accuracy import bitwise_accuracy
+from app.services.executor import run_inference
+from app.services.worker_pool import worker_pool, run_in_worker
+from app.services.encoder import media_type, extension
 
 router = APIRouter(
     prefix="/api/fingerprinting",
     tags=["fingerprinting"]
 )
 
+DECODE_OUTPUT_FORMATS = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+DECODE_FIELDS = ("filename", "fingerprint", "bitwise_accuracy_ratio", "error")
+
+
+def _format_decode_row(row: dict, output_format: str) -> bytes:
+    if output_format == "jsonl":
+        return (json.dumps(row) + "\n").encode("utf-8")
+    buffer = StringIO()
+    csv.writer(buffer).writerow(["" if row[field] is None else row[field] for field in DECODE_FIELDS])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _read_chunk(images, size: int) -> tuple[list, list]:
+    chunk = list(itertools.islice(images, size))
+    return [name for name, _ in chunk], [BytesIO(data) for _, data in chunk]
+
+
+async def _stream_decode_batch(images, zip_path, first_chunk, expected_fingerprint, output_format):
+    """Mengirim hasil per batch decoder segera setelah batch tersebut selesai
+
+    zip_path adalah salinan upload milik request ini dan dihapus setelah streaming selesai.
+    """
+    try:
+        if output_format == "csv":
+            yield _format_decode_row(dict(zip(DECODE_FIELDS, DECODE_FIELDS)), output_format)
+
+        filenames, results = first_chunk
+        while filenames:
+            yield b"".join(
+                _format_decode_row({"filename": name, **result}, output_format)
+                for name, result in zip(filenames, results)
+            )
+            filenames, image_files = await run_inference(_read_chunk, images, config.FINGERPRINT_BATCH_SIZE)
+            if filenames:
+                results = await run_in_worker(fingerprinting.decode_batch, image_files, expected_fingerprint)
+    finally:
+        images.close()
+        _remove_file(zip_path)
+
+
+def _parse_seeds(seeds: str) -> list[int]:
+    try:
+        return [int(s) for s in seeds.split(",") if s.strip()]
+    except ValueError:
+        raise ValueError("seeds harus berupa daftar bilangan bulat yang dipisah koma")
+
+
+def _fingerprint_manifest(filenames: list, fingerprints: list, seed: int, seeds: Optional[list]) -> dict:
+    """Satu baris per file dalam bentuk kolom agar tetap ringkas untuk puluhan ribu gambar"""
+    columns = ["filename", "fingerprint"]
+    rows = [list(row) for row in zip(filenames, fingerprints)]
+    if seeds is not None:
+        columns.append("seed")
+        for row, s in zip(rows, seeds):
+            row.append(s)
+    return {
+        "seed": None if seeds is not None else seed,
+        "fingerprint_size": len(fingerprints[0]) if fingerprints else 0,
+        "columns": columns,
+        "files": rows
+    }
+
+
+def _copy_to_disk(source, path: str) -> str:
+    source.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(source, f)
+    return path
+
+
+def _spool_upload(source) -> str:
+    """Menyalin upload ke file sementara milik request; UploadFile ditutup framework saat handler selesai"""
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as f:
+        shutil.copyfileobj(source, f)
+        return f.name
+
+
+def _remove_file(path: Optional[str]):
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _zip_source(file: UploadFile, tmp_dir: str):
+    """Upload sudah di-spool oleh Starlette (ke disk jika besar) dan dibaca langsung dari sana
+
+    Proses worker tidak bisa menerima file object, jadi untuk pool proses upload disalin sekali ke disk.
+    """
+    if not worker_pool.enabled:
+        return file.file
+    return await run_inference(_copy_to_disk, file.file, os.path.join(tmp_dir, "input.zip"))
+
+
 @router.post("/embed")
-async def embed_fingerprint(image: UploadFile = File(...), seed: int = Form(...)):
+async def embed_fingerprint(
+    image: UploadFile = File(...),
+    seed: int = Form(...),
+    response_mode: str = Form("url"),
+    persist: bool = Form(True)
+):
     try:
+        if response_mode not in RESPONSE_MODES:
+            raise ValueError(f"response_mode harus salah satu dari {', '.join(RESPONSE_MODES)}")
+
         image_data = await image.read()
-        filename = f"{uuid.uuid4()}.png"
+        request_id = str(uuid.uuid4())
+        filename = f"{uuid.uuid4()}.{extension(config.FINGERPRINT_IMAGE_FORMAT)}"
         save_path = os.path.join("static", "images", "embed", filename)
+        in_memory = response_mode != "url" and not persist
+
+        output, fingerprint_str, metrics = await run_in_worker(
+            fingerprinting.embed, image_data, seed=seed, save_path=None if in_memory else save_path
+        )
+
+        data = {
+            "image_url": None if in_memory else f"/static/images/embed/{filename}",
+            "filename": filename,
+            "fingerprint": fingerprint_str,
+            "metrics": metrics,
+            "request_id": request_id,
+        }
 
-        _, fingerprint_str, metrics = fp_service.embed(BytesIO(image_data), seed=seed, save_path=save_path)
+        if response_mode != "url":
+            image_bytes = output.getvalue() if in_memory else await run_inference(read_bytes, output)
+            if response_mode == "image":
+                return image_response(image_bytes, media_type=media_type(config.FINGERPRINT_IMAGE_FORMAT), headers={
+                    "X-Fingerprint": fingerprint_str,
+                    "X-Metrics": json.dumps(metrics),
+                    "X-Request-Id": request_id,
+                })
+            return multipart_response(
+                message="Fingerprint embedded successfully",
+                data=data,
+                image=image_bytes,
+                filename=filename,
+                media_type=media_type(config.FINGERPRINT_IMAGE_FORMAT)
+            )
 
         return success_response(
             message="Fingerprint embedded successfully",
-            data={
-                "image_url": f"/static/images/embed/{filename}",
-                "filename": filename,
-                "fingerprint": fingerprint_str,
-                "metrics": metrics,
-                "request_id": str(uuid.uuid4()),
-            }
+            data=data
         )
 
     except Exception as e:
         return error_response(
             message="Error embedding fingerprint",
-            error=str(e),
+            detail=str(e),
             status_code=500
         )
 
@@ -52,7 +189,7 @@ async def embed_fingerprint(image: UploadFile = File(...), seed: int = Form(...)
 async def decode_fingerprint(image: UploadFile = File(...), input_fingerprint: str = Form(...)):
     try:
         image_bytes = await image.read()
-        fingerprint = fp_service.decode(BytesIO(image_bytes))
+        fingerprint = await run_in_worker(fingerprinting.decode, image_bytes)
 
         # input_fingerprint = "01000100010000101110101111111100111010000011111011010101100000000110111101011101010100101111111111100111111110101101011010100110"
 
@@ -72,36 +209,38 @@ async def decode_fingerprint(image: UploadFile = File(...), input_fingerprint: s
     except Exception as e:
         return error_response(
             message="Error decoding fingerprint",
-            error=str(e),
+            detail=str(e),
             status_code=500
         )
 
 @router.post("/embed-batch")
 async def embed_fingerprint_batch(
     file: UploadFile = File(...),
-    seed: int = Form(...)
+    seed: int = Form(0),
+    seeds: Optional[str] = Form(None)
 ):
     try:
         if not file.filename.lower().endswith('.zip'):
             raise ValueError("File must be a zip archive containing images")
-        
+
+        # seeds: satu seed per gambar (dipisah koma, urut sesuai isi zip); tanpa seeds dipakai base seed
+        seed_list = _parse_seeds(seeds) if seeds else None
+
         request_id = str(uuid.uuid4())
         save_path = os.path.join("static", "zip", "batch_fingerprints")
 
         with tempfile.TemporaryDirectory() as tmp_dir:
-            zip_file = BytesIO(await file.read())
-            image_paths, filenames = ZipImageProcessor.extract_images(zip_file, tmp_dir)
-
-            outputs, fingerprints, metrics = fp_service.embed_batch(image_paths, seed)
-
-            fingerprint_dict = {
-                "fingerprint": fingerprints[0],
-            }
+            zip_source = await _zip_source(file, tmp_dir)
+            outputs, filenames, fingerprints, metrics = await run_in_worker(
+                fingerprinting.embed_zip, zip_source, seed, seeds=seed_list
+            )
+            manifest = _fingerprint_manifest(filenames, fingerprints, seed, seed_list)
 
-            zip_filename = ZipImageProcessor.create_zip(
+            zip_filename = await run_inference(
+                ZipImageProcessor.create_zip,
                 outputs,
                 filenames,
-                fingerprint_dict,
+                manifest,
                 output_dir=save_path,
                 request_id=request_id
             )
@@ -112,13 +251,67 @@ async def embed_fingerprint_batch(
                 "zip_url": f"/{zip_filename}",
                 "request_id": request_id,
                 "metrics": metrics,
-                "fingerprints": fingerprint_dict
+                "fingerprints": manifest
             }
         )
     
     except Exception as e:
         return error_response(
             message="Error embedding fingerprints in batch",
-            error=str(e),
+            detail=str(e),
+            status_code=500
+        )
+
+@router.post("/decode-batch")
+async def decode_fingerprint_batch(
+    file: UploadFile = File(...),
+    expected_fingerprint: Optional[str] = Form(None),
+    output_format: str = Form("jsonl")
+):
+    if output_format not in DECODE_OUTPUT_FORMATS:
+        return error_response(
+            message="Format output tidak didukung",
+            detail=f"output_format harus salah satu dari {', '.join(DECODE_OUTPUT_FORMATS)}",
+            status_code=400
+        )
+    if expected_fingerprint is not None and set(expected_fingerprint) - {"0", "1"}:
+        return error_response(
+            message="Fingerprint tidak valid",
+            detail="expected_fingerprint hanya boleh berisi 0 dan 1",
+            status_code=400
+        )
+
+    zip_path = None
+    images = None
+    try:
+        if not file.filename.lower().endswith('.zip'):
+            raise ValueError("File must be a zip archive containing images")
+
+        # Streaming berjalan setelah handler selesai, jadi dibaca dari salinan, bukan dari UploadFile
+        zip_path = await run_inference(_spool_upload, file.file)
+        images = ZipImageProcessor.iter_images(zip_path)
+        image_count = await run_inference(ZipImageProcessor.count_images, zip_path)
+
+        # Batch pertama didecode sebelum streaming dimulai agar error masih bisa dikirim sebagai JSON
+        filenames, image_files = await run_inference(_read_chunk, images, config.FINGERPRINT_BATCH_SIZE)
+        first_results = await run_in_worker(fingerprinting.decode_batch, image_files, expected_fingerprint)
+    except Exception as e:
+        if images is not None:
+            images.close()
+        _remove_file(zip_path)
+        return error_response(
+            message="Error decoding fingerprints in batch",
+            detail=str(e),
             status_code=500
         )
+
+    request_id = str(uuid.uuid4())
+    return StreamingResponse(
+        _stream_decode_batch(images, zip_path, (filenames, first_results), expected_fingerprint, output_format),
+        media_type=DECODE_OUTPUT_FORMATS[output_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="fingerprints_{request_id}.{output_format}"',
+            "X-Image-Count": str(image_count),
+            "X-Request-Id": request_id,
+        }
+    )
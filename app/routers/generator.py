@@ -1,11 +1,25 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uuid
 import os
+import math
 
-from app.models.stylegan import generate_image
-from app.schemas.request import GenerationRequest
-from app.utils.response import success_response, error_response
+from app.models.stylegan import (
+    generate_image, generate_image_from_latents, fetch_latents,
+    interpolation_keyframes, interpolation_frame_count, interpolation_steps, stream_interpolation,
+    render_grid, write_bytes,
+    model_cache, model_catalog, batcher, w_cache, result_cache
+)
+from app import config
+from app.schemas.request import GenerationRequest, LatentRequest, LatentGenerationRequest, InterpolationRequest, GridRequest
+from app.utils.response import success_response, error_response, image_response, multipart_response
+from app.utils.image import path_to_url
+from app.utils.animation import ANIMATION_WRITERS
+from app.services.executor import inference_executor, run_inference
+from app.services.worker_pool import worker_pool, run_in_worker
+from app.services.encoder import image_encoder, media_type, extension
+from app.utils.process import memory_stats
+from app.utils.dataset import image_loader
 
 router = APIRouter(
     prefix="/api/generator",
@@ -15,28 +29,232 @@ router = APIRouter(
 @router.post("/generate")
 async def generate(request: GenerationRequest):
     try:
-        filename = f"{uuid.uuid4()}.png"
-        save_path = os.path.join("static", "images", "GAN", filename)
-        
-        await generate_image(
+        return_bytes = request.response_mode != "url"
+        result = await generate_image(
             model_name=request.model_name,
             seed=request.seed,
             # truncation_psi=request.truncation_psi,
-            save_path=save_path
+            return_bytes=return_bytes,
+            persist=request.persist or not return_bytes,
+            sizes=request.sizes,
+            image_format=request.format
         )
 
+        request_id = str(uuid.uuid4())
+
+        def variant_filename(variant):
+            if variant.path:
+                return os.path.basename(variant.path)
+            suffix = "" if variant.size == result.size else f"_{variant.size}"
+            return f"{request_id}{suffix}.{extension(variant.format)}"
+
+        filename = variant_filename(result)
+        data = {
+            "image_url": path_to_url(result.path) if result.path else None,
+            "filename": filename,
+            "seed": result.seed,
+            "cached": result.cached,
+            "size": result.size,
+            "images": [
+                {
+                    "size": label,
+                    "image_url": path_to_url(variant.path) if variant.path else None,
+                    "filename": variant_filename(variant),
+                    "cached": variant.cached,
+                }
+                for label, variant in result.variants.items()
+            ],
+            "request_id": request_id,
+        }
+
+        if request.response_mode == "image":
+            return image_response(result.data, media_type=media_type(result.format), headers={
+                "X-Seed": str(result.seed),
+                "X-Size": result.size,
+                "X-Request-Id": request_id,
+            })
+        if request.response_mode == "multipart":
+            return multipart_response(
+                message="Gambar berhasil digenerate",
+                data=data,
+                image=result.data,
+                filename=filename,
+                media_type=media_type(result.format),
+                extra_images=[
+                    (variant_filename(variant), variant.data)
+                    for label, variant in result.variants.items() if label != result.size
+                ]
+            )
+
         return success_response(
             message="Gambar berhasil digenerate",
+            data=data
+        )
+    
+    except Exception as e:
+        return error_response(
+            message="Terjadi kesalahan saat menggenerate gambar",
+            detail=str(e),
+            status_code=500
+        )
+
+@router.post("/latents")
+async def get_latents(request: LatentRequest):
+    try:
+        seed, ws = await fetch_latents(
+            model_name=request.model_name,
+            seed=request.seed,
+            truncation_psi=request.truncation_psi
+        )
+
+        return success_response(
+            message="W latent berhasil diambil",
+            data={
+                "model_name": request.model_name,
+                "seed": seed,
+                "truncation_psi": request.truncation_psi,
+                "ws": ws,
+            }
+        )
+
+    except Exception as e:
+        return error_response(
+            message="Terjadi kesalahan saat mengambil W latent",
+            detail=str(e),
+            status_code=500
+        )
+
+@router.post("/generate-from-latents")
+async def generate_from_latents(request: LatentGenerationRequest):
+    try:
+        filename = f"{uuid.uuid4()}.png"
+        save_path = os.path.join("static", "images", "GAN", filename)
+
+        await generate_image_from_latents(
+            model_name=request.model_name,
+            ws=request.ws,
+            save_path=save_path
+        )
+
+        return success_response(
+            message="Gambar berhasil digenerate dari W latent",
             data={
                 "image_url": f"/static/images/GAN/{filename}",
                 "filename": filename,
                 "request_id": str(uuid.uuid4()),
             }
         )
-    
+
     except Exception as e:
         return error_response(
-            message="Terjadi kesalahan saat menggenerate gambar",
+            message="Terjadi kesalahan saat menggenerate gambar dari W latent",
+            detail=str(e),
+            status_code=500
+        )
+
+@router.post("/interpolate")
+async def interpolate(request: InterpolationRequest):
+    if len(request.seeds) < 2:
+        return error_response(
+            message="Minimal dua seed dibutuhkan untuk interpolasi",
+            status_code=400
+        )
+
+    # Batas dicek dari jumlah frame hasil hitungan, sebelum daftar step dibangun
+    frame_count = interpolation_frame_count(len(request.seeds), request.frames_per_transition, request.loop)
+    if frame_count > config.ANIMATION_MAX_FRAMES:
+        return error_response(
+            message="Jumlah frame melebihi batas",
+            detail=f"{frame_count} frame, maksimal {config.ANIMATION_MAX_FRAMES}",
+            status_code=400
+        )
+    steps = interpolation_steps(len(request.seeds), request.frames_per_transition, request.loop)
+
+    try:
+        # Model dimuat dan keyframe dihitung sebelum streaming dimulai agar error masih bisa dikirim sebagai JSON
+        keyframes = await run_in_worker(
+            interpolation_keyframes, request.model_name, request.seeds, request.space, request.truncation_psi
+        )
+    except Exception as e:
+        return error_response(
+            message="Terjadi kesalahan saat menyiapkan interpolasi",
+            detail=str(e),
+            status_code=500
+        )
+
+    writer = ANIMATION_WRITERS[request.format](len(steps), request.fps, loop=request.loop)
+    request_id = str(uuid.uuid4())
+    return StreamingResponse(
+        stream_interpolation(
+            request.model_name, keyframes, steps, request.space, request.truncation_psi, writer
+        ),
+        media_type=writer.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{request_id}.{writer.extension}"',
+            "X-Frame-Count": str(len(steps)),
+            "X-Request-Id": request_id,
+        }
+    )
+
+@router.post("/grid")
+async def generate_grid(request: GridRequest):
+    # Batas dicek sebelum daftar seed dibangun dari rentang
+    seed_total = len(request.seeds) if request.seeds else request.seed_count
+    if seed_total > config.GRID_MAX_SEEDS:
+        return error_response(
+            message="Jumlah seed melebihi batas",
+            detail=f"{seed_total} seed, maksimal {config.GRID_MAX_SEEDS}",
+            status_code=400
+        )
+    seeds = request.seeds or list(range(request.seed_start, request.seed_start + request.seed_count))
+
+    try:
+        columns = request.columns or math.ceil(math.sqrt(len(seeds)))
+        grid, thumbnails = await render_grid(
+            model_name=request.model_name,
+            seeds=seeds,
+            columns=columns,
+            truncation_psi=request.truncation_psi,
+            thumbnail_size=request.thumbnail_size
+        )
+        image_format = request.format or config.IMAGE_FORMAT
+        ext = extension(image_format)
+        grid_data = await image_encoder.encode_async(grid, image_format)
+
+        request_id = str(uuid.uuid4())
+        if request.response_mode == "image":
+            return image_response(grid_data, media_type=media_type(image_format), headers={
+                "X-Seeds": ",".join(map(str, seeds)),
+                "X-Request-Id": request_id,
+            })
+
+        grid_path = os.path.join("static", "images", "GAN", f"{request_id}_grid.{ext}")
+        await run_inference(write_bytes, grid_data, grid_path)
+
+        thumbnail_data = None
+        if thumbnails is not None:
+            thumbnail_data = []
+            encoded = await image_encoder.encode_batch_async(thumbnails, image_format)
+            for seed, data in zip(seeds, encoded):
+                thumbnail_path = os.path.join("static", "images", "GAN", f"{request_id}_{seed}.{ext}")
+                await run_inference(write_bytes, data, thumbnail_path)
+                thumbnail_data.append({"seed": seed, "image_url": path_to_url(thumbnail_path)})
+
+        return success_response(
+            message="Grid berhasil digenerate",
+            data={
+                "grid_url": path_to_url(grid_path),
+                "seeds": seeds,
+                "columns": columns,
+                "rows": math.ceil(len(seeds) / columns),
+                "thumbnails": thumbnail_data,
+                "request_id": request_id,
+            }
+        )
+
+    except Exception as e:
+        return error_response(
+            message="Terjadi kesalahan saat menggenerate grid",
             detail=str(e),
             status_code=500
         )
@@ -44,18 +262,14 @@ async def generate(request: GenerationRequest):
 @router.get("/models")
 async def list_models():
     try:
-        models_dir = "pretrained_models"
-        
-        if not os.path.exists(models_dir):
-            raise FileNotFoundError(
-                "Direktori model tidak ditemukan"
-            )
-        
-        models = [f for f in os.listdir(models_dir) if f.endswith(".pkl")]
+        catalog = await run_inference(model_catalog.list)
 
         return success_response(
             message="Daftar model berhasil diambil",
-            data={"models": models}
+            data={
+                "models": [entry["name"] for entry in catalog],
+                "catalog": catalog
+            }
         )
         
     except Exception as e:
@@ -64,3 +278,21 @@ async def list_models():
             detail=str(e),
             status_code=500
         )
+
+@router.get("/metrics")
+async def get_metrics():
+    return success_response(
+        message="Metrik generator berhasil diambil",
+        data={
+            "model_cache": model_cache.stats(),
+            "model_catalog": model_catalog.stats(),
+            "batcher": batcher.stats(),
+            "w_cache": w_cache.stats(),
+            "result_cache": result_cache.stats(),
+            "executor": inference_executor.stats(),
+            "worker_pool": worker_pool.stats(),
+            "encoder": image_encoder.stats(),
+            "image_loader": image_loader.stats(),
+            "process": memory_stats()
+        }
+    )
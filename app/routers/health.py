@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+
+from app.services.warmup import warmup_state
+from app.utils.response import success_response, error_response
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"]
+)
+
+@router.get("/live")
+async def live():
+    return success_response(message="Service berjalan")
+
+@router.get("/ready")
+async def ready():
+    if warmup_state.ready:
+        return success_response(
+            message="Service siap menerima request" if warmup_state.status == "ready"
+            else "Service siap menerima request, sebagian warm-up gagal",
+            data=warmup_state.to_dict()
+        )
+
+    return error_response(
+        message="Service belum siap",
+        detail=warmup_state.status,
+        status_code=503
+    )
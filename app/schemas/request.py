@@ -1,7 +1,64 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
+
+from app import config
+
+# Rentang seed yang diterima np.random.RandomState
+Seed = Annotated[int, Field(ge=0, le=2**32 - 1)]
+OutputSize = Annotated[int, Field(ge=1)]
 
 class GenerationRequest(BaseModel):
     model_name: str = Field(..., description="Nama model StyleGAN2 yang akan digunakan")
-    seed: Optional[int] = Field(None, description="Seed untuk random generator")
-    # truncation_psi: float = Field(0.7, description="Nilai truncation psi (0-1)", ge=0, le=1)
\ No newline at end of file
+    seed: Optional[Seed] = Field(None, description="Seed untuk random generator")
+    # truncation_psi: float = Field(0.7, description="Nilai truncation psi (0-1)", ge=0, le=1)
+    response_mode: Literal["url", "image", "multipart"] = Field(
+        "url", description="url = JSON berisi URL gambar, image = byte PNG langsung, multipart = JSON + PNG"
+    )
+    persist: bool = Field(True, description="Simpan gambar ke direktori static (wajib untuk mode url)")
+    sizes: List[Union[Literal["full"], OutputSize]] = Field(
+        ["full"], description="Ukuran output, misalnya [\"full\", 256, 128]; ukuran pertama menjadi gambar utama"
+    )
+    format: Optional[Literal["png", "webp", "jpeg"]] = Field(
+        None, description="Format gambar (webp = lossless); default mengikuti IMAGE_FORMAT"
+    )
+
+class LatentRequest(BaseModel):
+    model_name: str = Field(..., description="Nama model StyleGAN2 yang akan digunakan")
+    seed: Optional[Seed] = Field(None, description="Seed untuk random generator")
+    truncation_psi: float = Field(0.7, description="Nilai truncation psi (0-1)", ge=0, le=1)
+
+
+class LatentGenerationRequest(BaseModel):
+    model_name: str = Field(..., description="Nama model StyleGAN2 yang akan digunakan")
+    ws: List[List[float]] = Field(..., description="W latent dengan bentuk [num_ws, w_dim] atau [1, w_dim]")
+
+
+class InterpolationRequest(BaseModel):
+    model_name: str = Field(..., description="Nama model StyleGAN2 yang akan digunakan")
+    seeds: List[Seed] = Field(
+        ..., description="Daftar seed yang dilewati animasi (minimal 2)", max_length=config.ANIMATION_MAX_FRAMES
+    )
+    frames_per_transition: int = Field(
+        30, description="Jumlah frame untuk setiap transisi antar seed", ge=1, le=config.ANIMATION_MAX_FRAMES
+    )
+    space: Literal["z", "w"] = Field("w", description="z = slerp di ruang Z, w = interpolasi linear di ruang W")
+    truncation_psi: float = Field(0.7, description="Nilai truncation psi (0-1)", ge=0, le=1)
+    format: Literal["gif", "apng", "webp", "zip"] = Field("gif", description="Format animasi, atau zip berisi frame PNG")
+    fps: float = Field(30, description="Frame per detik", gt=0, le=100)
+    loop: bool = Field(True, description="Kembali ke seed pertama di akhir animasi")
+
+
+class GridRequest(BaseModel):
+    model_name: str = Field(..., description="Nama model StyleGAN2 yang akan digunakan")
+    seeds: Optional[List[Seed]] = Field(
+        None, description="Daftar seed; jika kosong dipakai seed_start dan seed_count", max_length=config.GRID_MAX_SEEDS
+    )
+    seed_start: int = Field(0, description="Seed pertama untuk rentang seed", ge=0)
+    seed_count: int = Field(16, description="Jumlah seed dalam rentang", ge=1, le=config.GRID_MAX_SEEDS)
+    columns: Optional[int] = Field(None, description="Jumlah kolom grid (default: akar jumlah seed)", ge=1)
+    truncation_psi: float = Field(0.7, description="Nilai truncation psi (0-1)", ge=0, le=1)
+    thumbnail_size: Optional[int] = Field(None, description="Jika diisi, thumbnail tiap seed juga dikembalikan", ge=16)
+    response_mode: Literal["url", "image"] = Field("url", description="url = JSON berisi URL, image = byte gambar grid langsung")
+    format: Optional[Literal["png", "webp", "jpeg"]] = Field(
+        None, description="Format gambar (webp = lossless); default mengikuti IMAGE_FORMAT"
+    )
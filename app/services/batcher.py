@@ -0,0 +1,97 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class MicroBatcher:
+    """Mengumpulkan request bersamaan dengan key yang sama menjadi satu batch"""
+
+    def __init__(
+        self,
+        process_batch: Callable[[Hashable, list], Awaitable[list]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.01
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._queues: dict[Hashable, asyncio.Queue] = {}
+        self._workers: dict[Hashable, asyncio.Task] = {}
+
+        self.total_batches = 0
+        self.total_requests = 0
+        self.max_observed_batch = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+        self.total_batch_time = 0.0
+
+    async def submit(self, key: Hashable, item: Any):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = asyncio.Queue()
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = loop.create_task(self._worker(key, queue))
+
+        await queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _worker(self, key: Hashable, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._run(key, batch)
+
+    async def _run(self, key: Hashable, batch: list):
+        start = time.perf_counter()
+        delays = [start - enqueued_at for _, _, enqueued_at in batch]
+        items = [item for item, _, _ in batch]
+
+        try:
+            results = await self.process_batch(key, items)
+            if len(results) != len(items):
+                raise RuntimeError("Jumlah hasil batch tidak sesuai dengan jumlah request")
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        self.total_batches += 1
+        self.total_requests += len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+        self.total_queue_delay += sum(delays)
+        self.max_queue_delay = max(self.max_queue_delay, max(delays))
+        self.total_batch_time += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait": self.max_wait,
+            "total_batches": self.total_batches,
+            "total_requests": self.total_requests,
+            "avg_batch_size": self.total_requests / self.total_batches if self.total_batches else 0.0,
+            "max_observed_batch": self.max_observed_batch,
+            "avg_queue_delay": self.total_queue_delay / self.total_requests if self.total_requests else 0.0,
+            "max_queue_delay": self.max_queue_delay,
+            "avg_batch_time": self.total_batch_time / self.total_batches if self.total_batches else 0.0,
+            "pending": sum(queue.qsize() for queue in self._queues.values())
+        }
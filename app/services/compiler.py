@@ -0,0 +1,128 @@
+import os
+import time
+import functools
+import itertools
+import warnings
+import traceback
+
+import torch
+
+
+class CompiledSynthesis:
+    """Synthesis network G.synthesis yang sudah di-trace dengan TorchScript untuk batch size tertentu
+
+    Batch yang ukurannya tidak ada di daftar akan di-pad ke ukuran terdekat yang lebih besar,
+    atau dijalankan secara eager jika melebihi ukuran terbesar.
+    """
+
+    def __init__(self, synthesis: torch.nn.Module, modules: dict):
+        self.synthesis = synthesis
+        self.modules = modules
+        self.batch_sizes = sorted(modules)
+
+    def __call__(self, ws: torch.Tensor, noise_mode: str = 'const'):
+        batch_size = ws.shape[0]
+        target = next((b for b in self.batch_sizes if b >= batch_size), None)
+        if noise_mode != 'const' or target is None:
+            return self.synthesis(ws, noise_mode=noise_mode)
+
+        if target != batch_size:
+            ws = torch.cat([ws, ws[-1:].expand(target - batch_size, -1, -1)])
+        return self.modules[target](ws)[:batch_size]
+
+
+class _SynthesisConst(torch.nn.Module):
+    def __init__(self, synthesis):
+        super().__init__()
+        self.synthesis = synthesis
+
+    def forward(self, ws):
+        return self.synthesis(ws, noise_mode='const')
+
+
+def _artifact_path(cache_dir: str, model_hash: str, batch_size: int) -> str:
+    torch_version = torch.__version__.replace('+', '_')
+    return os.path.join(cache_dir, f"{model_hash}-torch{torch_version}-b{batch_size}.pt")
+
+
+def _share_tensors(module, synthesis: torch.nn.Module):
+    """torch.jit.load membuat salinan bobot sendiri; diarahkan kembali ke tensor milik G.synthesis
+    agar setiap batch size tidak menyimpan salinan bobot lagi di memori"""
+    tensors = dict(itertools.chain(synthesis.named_parameters(), synthesis.named_buffers()))
+    for name, _ in list(itertools.chain(module.named_parameters(), module.named_buffers())):
+        # Nama di module hasil trace diawali "synthesis." dari _SynthesisConst
+        owner_path, _, attr = name.rpartition('.')
+        source_name = name.split('.', 1)[1]
+        if source_name not in tensors:
+            raise KeyError(f"Tensor {source_name} tidak ada di synthesis network")
+        # get_submodule tidak didukung ScriptModule, jadi ditelusuri lewat atribut
+        owner = functools.reduce(getattr, owner_path.split('.'), module)
+        setattr(owner, attr, tensors[source_name])
+
+
+def _check(module, synthesis, ws, tolerance: float):
+    with torch.no_grad():
+        expected = synthesis(ws, noise_mode='const')
+        actual = module(ws)
+    error = (expected - actual).abs().max().item()
+    if error > tolerance:
+        raise RuntimeError(f"Hasil trace berbeda dari eager (max error {error:.2e})")
+
+
+def compile_synthesis(
+    G,
+    model_hash: str,
+    batch_sizes: list[int],
+    cache_dir: str,
+    tolerance: float = 1e-3
+):
+    """Trace G.synthesis untuk setiap batch size, memakai artifact di disk jika sudah ada.
+
+    Mengembalikan None jika kompilasi gagal sehingga pemanggil tetap memakai mode eager.
+    """
+    device = next(G.parameters()).device
+    modules = {}
+
+    for batch_size in sorted(set(batch_sizes)):
+        path = _artifact_path(cache_dir, model_hash, batch_size)
+        ws = torch.randn([batch_size, G.num_ws, G.w_dim], device=device)
+        start = time.perf_counter()
+
+        module = None
+        source = "cache"
+        if os.path.exists(path):
+            try:
+                module = torch.jit.load(path, map_location=device)
+                _share_tensors(module, G.synthesis)
+                _check(module, G.synthesis, ws, tolerance)
+            except Exception as e:
+                # Artifact rusak atau tidak cocok, di-trace ulang
+                print(f"Artifact {path} tidak bisa dipakai: {str(e)}")
+                os.remove(path)
+                module = None
+
+        try:
+            if module is None:
+                source = "trace"
+                with torch.no_grad():
+                    module = torch.jit.trace(_SynthesisConst(G.synthesis), ws, check_trace=False)
+                _check(module, G.synthesis, ws, tolerance)
+
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                torch.jit.save(module, tmp_path)
+                os.replace(tmp_path, path)
+
+        except Exception:
+            warnings.warn(
+                f"Gagal mengompilasi synthesis network untuk batch size {batch_size}, "
+                f"memakai mode eager. Detail:\n\n{traceback.format_exc()}"
+            )
+            continue
+
+        modules[batch_size] = module
+        print(f"Synthesis network batch size {batch_size} siap ({source}, {time.perf_counter() - start:.2f} detik)")
+
+    if not modules:
+        return None
+    return CompiledSynthesis(G.synthesis, modules)
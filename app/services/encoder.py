@@ -0,0 +1,111 @@
+import time
+import asyncio
+import threading
+from io import BytesIO
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+
+from app import config
+
+# format -> (format PIL, media type, ekstensi file)
+IMAGE_FORMATS = {
+    "png": ("PNG", "image/png", "png"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+# Fingerprint rusak oleh kompresi lossy, jadi output fingerprinting hanya boleh format ini
+LOSSLESS_FORMATS = ("png", "webp")
+
+
+def media_type(fmt: str) -> str:
+    return IMAGE_FORMATS[fmt][1]
+
+
+def extension(fmt: str) -> str:
+    return IMAGE_FORMATS[fmt][2]
+
+
+def tensor_to_uint8(img: torch.Tensor) -> np.ndarray:
+    """Tensor float [C, H, W] atau [N, C, H, W] rentang [0, 1] ke uint8 HWC, pembulatannya sama dengan torchvision save_image"""
+    img = img.detach().mul(255).add_(0.5).clamp_(0, 255)
+    return img.movedim(-3, -1).to("cpu", torch.uint8).numpy()
+
+
+class ImageEncoder:
+    """Encode gambar uint8 HWC ke PNG/WebP lossless/JPEG; encoder PIL melepas GIL sehingga bisa paralel di thread pool"""
+
+    def __init__(self, max_workers: int, png_compress_level: int = 6, jpeg_quality: int = 90):
+        self.max_workers = max_workers
+        self.png_compress_level = png_compress_level
+        self.jpeg_quality = jpeg_quality
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="encode")
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _params(self, fmt: str) -> dict:
+        if fmt == "png":
+            return {"compress_level": self.png_compress_level}
+        if fmt == "webp":
+            return {"lossless": True}
+        return {"quality": self.jpeg_quality}
+
+    def encode(self, img: np.ndarray, fmt: str = "png") -> bytes:
+        if fmt not in IMAGE_FORMATS:
+            raise ValueError(f"Format gambar {fmt} tidak didukung, pilih salah satu dari {list(IMAGE_FORMATS)}")
+
+        start = time.perf_counter()
+        buffer = BytesIO()
+        Image.fromarray(img, "RGB").save(buffer, format=IMAGE_FORMATS[fmt][0], **self._params(fmt))
+        data = buffer.getvalue()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            stats = self._stats.setdefault(fmt, {"images": 0, "bytes": 0, "total_time": 0.0})
+            stats["images"] += 1
+            stats["bytes"] += len(data)
+            stats["total_time"] += elapsed
+        return data
+
+    def encode_many(self, images: list, fmt: str = "png") -> list[bytes]:
+        """Encode banyak gambar secara paralel; aman dipanggil dari thread inferensi"""
+        if len(images) <= 1:
+            return [self.encode(img, fmt) for img in images]
+        return list(self._pool.map(lambda img: self.encode(img, fmt), images))
+
+    def submit_many(self, images: list, fmt: str = "png") -> list[Future]:
+        """Mengantrikan encode tanpa menunggu, agar pemanggil bisa lanjut ke batch berikutnya"""
+        return [self._pool.submit(self.encode, img, fmt) for img in images]
+
+    async def encode_async(self, img: np.ndarray, fmt: str = "png") -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.encode, img, fmt)
+
+    async def encode_batch_async(self, images: list, fmt: str = "png") -> list[bytes]:
+        return await asyncio.gather(*(self.encode_async(img, fmt) for img in images))
+
+    def stats(self) -> dict:
+        with self._lock:
+            formats = {
+                fmt: {
+                    **stats,
+                    "avg_time": stats["total_time"] / stats["images"] if stats["images"] else 0.0
+                }
+                for fmt, stats in self._stats.items()
+            }
+        return {
+            "max_workers": self.max_workers,
+            "png_compress_level": self.png_compress_level,
+            "jpeg_quality": self.jpeg_quality,
+            "formats": formats
+        }
+
+
+image_encoder = ImageEncoder(
+    max_workers=config.ENCODE_WORKERS,
+    png_compress_level=config.PNG_COMPRESS_LEVEL,
+    jpeg_quality=config.JPEG_QUALITY
+)
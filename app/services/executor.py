@@ -0,0 +1,77 @@
+import os
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from app import config
+
+
+class InferenceExecutor:
+    """Thread pool terbatas untuk menjalankan inferensi di luar event loop"""
+
+    def __init__(self, max_workers: int, intra_op_threads: int = 0):
+        self.max_workers = max_workers
+        if intra_op_threads > 0:
+            torch.set_num_threads(intra_op_threads)
+        self.intra_op_threads = torch.get_num_threads()
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_run_time = 0.0
+
+    def _call(self, fn, *args, **kwargs):
+        with self._lock:
+            self.active += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+                self.total_run_time += time.perf_counter() - start
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.submitted += 1
+        call = functools.partial(self._call, fn, *args, **kwargs)
+        return await loop.run_in_executor(self._pool, call)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "intra_op_threads": self.intra_op_threads,
+                "active": self.active,
+                "queued": self.submitted - self.completed - self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_run_time": self.total_run_time / self.completed if self.completed else 0.0
+            }
+
+
+inference_executor = InferenceExecutor(
+    max_workers=config.INFERENCE_WORKERS,
+    intra_op_threads=config.INFERENCE_INTRA_OP_THREADS or max(1, (os.cpu_count() or 1) // config.INFERENCE_WORKERS)
+)
+
+
+async def run_inference(fn, *args, **kwargs):
+    return await inference_executor.run(fn, *args, **kwargs)
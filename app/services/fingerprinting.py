@@ -1,31 +1,53 @@
 import os
+import time
+import pickle
+import threading
+from collections import deque
 import torch
 from torch.nn import functional as F
-from torchvision.utils import save_image
 from torchvision import transforms
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, Dataset
 
 
 from PIL import Image
 from io import BytesIO
-from app.utils.dataset import InMemoryDataset
+from typing import Optional
+from app import config
+from app.utils.dataset import InMemoryDataset, ZipImageDataset, image_loader
+from app.utils.zip_processor import ZipImageProcessor
+from app.services.encoder import image_encoder, tensor_to_uint8, LOSSLESS_FORMATS
 from app.models.stegastamp import StegaStampEncoder, StegaStampDecoder
 
+def load_state_dict(path, device, mmap=True):
+    """Memuat state dict; di CPU tensornya di-mmap dari file sehingga worker lain berbagi halaman yang sama
+
+    Mengembalikan (state_dict, mmapped). File format lama (non-zip) dimuat biasa.
+    """
+    if mmap and device.type == "cpu":
+        try:
+            return torch.load(path, map_location=device, mmap=True, weights_only=True), True
+        except (RuntimeError, TypeError, pickle.UnpicklingError):
+            pass
+    return torch.load(path, map_location=device), False
+
+
 class FingerprintService:
-    def __init__(self, encoder_path, decoder_path, device="cuda:0"):
+    def __init__(self, encoder_path, decoder_path, device="cuda:0", mmap=True):
         self.device = torch.device(device if torch.cuda.is_available() else "cpu")
 
-        state_dict = torch.load(encoder_path, map_location=self.device)
+        state_dict, mmapped = load_state_dict(encoder_path, self.device, mmap)
     
         self.fingerprint_size = state_dict["secret_dense.weight"].shape[-1]
 
+        # assign=True memakai tensor hasil mmap secara langsung, bukan menyalinnya ke parameter baru
         self.encoder = StegaStampEncoder(128, 3, fingerprint_size=self.fingerprint_size).to(self.device)
-        self.encoder.load_state_dict(state_dict)
-        self.encoder.eval()
+        self.encoder.load_state_dict(state_dict, assign=mmapped)
+        self.encoder.eval().requires_grad_(False)
 
+        state_dict, mmapped = load_state_dict(decoder_path, self.device, mmap)
         self.decoder = StegaStampDecoder(128, 3, fingerprint_size=self.fingerprint_size).to(self.device)
-        self.decoder.load_state_dict(torch.load(decoder_path, map_location=self.device))
-        self.decoder.eval()
+        self.decoder.load_state_dict(state_dict, assign=mmapped)
+        self.decoder.eval().requires_grad_(False)
 
         self.transform = transforms.Compose([
             transforms.Resize(128),
@@ -33,18 +55,35 @@ class FingerprintService:
             transforms.ToTensor()
         ])
 
+    @staticmethod
+    def _image_format(image_format: Optional[str]) -> str:
+        image_format = image_format or config.FINGERPRINT_IMAGE_FORMAT
+        if image_format not in LOSSLESS_FORMATS:
+            raise ValueError(f"Output fingerprint harus lossless ({', '.join(LOSSLESS_FORMATS)}), bukan {image_format}")
+        return image_format
+
+    def warmup(self, batch_size: int = 1):
+        images = torch.zeros([batch_size, 3, 128, 128], device=self.device)
+        fingerprints = torch.zeros([batch_size, self.fingerprint_size], device=self.device)
+
+        with torch.no_grad():
+            self.decoder(self.encoder(fingerprints, images))
+
     def embed(
         self,
         image_file: BytesIO,
         seed: int = 0,
-        save_path: str = "output.png"
+        save_path: Optional[str] = "output.png",
+        image_format: Optional[str] = None
     ):
         try:
-            torch.manual_seed(seed)
+            image_format = self._image_format(image_format)
+            # Generator lokal agar aman dipanggil bersamaan dari beberapa thread
+            generator = torch.Generator().manual_seed(seed)
             image = Image.open(image_file).convert("RGB")
             tensor_img = self.transform(image).unsqueeze(0).to(self.device)
 
-            fingerprint = torch.randint(0, 2, (1, self.fingerprint_size), dtype=torch.float).to(self.device)
+            fingerprint = torch.randint(0, 2, (1, self.fingerprint_size), dtype=torch.float, generator=generator).to(self.device)
 
             with torch.no_grad():
                 fingerprinted_image = self.encoder(fingerprint, tensor_img)
@@ -55,8 +94,15 @@ class FingerprintService:
                 detected_fingerprint = (detected_fingerprint > 0).long()
                 bitwise_accuracy = (detected_fingerprint == fingerprint.long()).float().mean().item()
 
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            save_image(fingerprinted_image.cpu(), save_path)
+            # Tanpa save_path, gambar hanya di-encode ke memori dan dikembalikan sebagai BytesIO
+            data = image_encoder.encode(tensor_to_uint8(fingerprinted_image[0]), image_format)
+            if save_path is None:
+                output = BytesIO(data)
+            else:
+                os.makedirs(os.path.dirname(save_path), exist_ok=True)
+                with open(save_path, "wb") as f:
+                    f.write(data)
+                output = save_path
 
             list_fingerprint = fingerprint.squeeze().cpu().long().numpy().tolist()
             fingerprint_str = "".join(map(str, list_fingerprint))
@@ -66,7 +112,7 @@ class FingerprintService:
                 "bitwise_accuracy": bitwise_accuracy
             }
 
-            return save_path, fingerprint_str, metrics
+            return output, fingerprint_str, metrics
         
         except Exception as e:
             raise ValueError(f"Terjadi kesalahan saat melakukan embed fingerprint: {str(e)}")
@@ -85,34 +131,127 @@ class FingerprintService:
         except Exception as e:
             raise ValueError(f"Terjadi kesalahan saat mendekode fingerprint: {str(e)}")
     
+    def decode_batch(self, image_files: list, expected_fingerprint: Optional[str] = None) -> list[dict]:
+        """Decode fingerprint sekumpulan gambar dalam satu forward pass decoder
+
+        Gambar yang gagal dibuka tidak menggagalkan batch; error-nya dilaporkan per file.
+        bitwise_accuracy_ratio bernilai 0-1, berbeda dengan bitwise_accuracy /decode yang berupa persentase.
+        """
+        if expected_fingerprint is not None and len(expected_fingerprint) != self.fingerprint_size:
+            raise ValueError(
+                f"Panjang fingerprint harus {self.fingerprint_size} bit, bukan {len(expected_fingerprint)}"
+            )
+
+        results = [None] * len(image_files)
+        tensors = []
+        valid = []
+        decoded = image_loader.iter_decoded(enumerate(image_files), self.transform, max(1, len(image_files)))
+        for i, tensor, error in decoded:
+            if error is not None:
+                # Detail error (bisa berisi path file sementara) tidak ikut dilaporkan
+                results[i] = {"fingerprint": None, "bitwise_accuracy_ratio": None, "error": "Gambar tidak valid atau rusak"}
+                continue
+            tensors.append(tensor)
+            valid.append(i)
+
+        if tensors:
+            with torch.no_grad():
+                bits = (self.decoder(torch.stack(tensors).to(self.device)) > 0).cpu()
+
+            accuracies = [None] * len(valid)
+            if expected_fingerprint is not None:
+                target = torch.tensor([bit == "1" for bit in expected_fingerprint])
+                accuracies = [round(a, 6) for a in (bits == target).double().mean(dim=1).tolist()]
+
+            for i, row, accuracy in zip(valid, bits.to(torch.uint8).numpy(), accuracies):
+                results[i] = {
+                    "fingerprint": "".join(map(str, row.tolist())),
+                    "bitwise_accuracy_ratio": accuracy,
+                    "error": None
+                }
+
+        return results
+
+    def _draw_fingerprints(self, generator: torch.Generator, batch_size: int, seeds: Optional[list] = None):
+        if seeds is None:
+            # Satu draw untuk seluruh batch dari generator yang di-seed sekali dengan base seed
+            return torch.randint(0, 2, (batch_size, self.fingerprint_size), dtype=torch.float, generator=generator)
+
+        # Seed per gambar menghasilkan fingerprint yang sama dengan /embed memakai seed tersebut
+        return torch.cat([
+            torch.randint(0, 2, (1, self.fingerprint_size), dtype=torch.float, generator=generator.manual_seed(s))
+            for s in seeds
+        ])
+
     def embed_batch(
-        self, image_paths: list[BytesIO],
-        seed: int = 0
+        self, dataset: Dataset,
+        seed: int = 0,
+        image_format: Optional[str] = None,
+        seeds: Optional[list] = None
     ):
+        """Embed fingerprint berbeda untuk setiap gambar
+
+        dataset menghasilkan pasangan (tensor gambar, nama file), misalnya InMemoryDataset atau ZipImageDataset.
+        Tanpa `seeds`, fingerprint diambil berurutan dari generator dengan base seed `seed`; dengan `seeds`,
+        gambar ke-i memakai seeds[i] dan jumlahnya harus sama dengan jumlah gambar valid.
+        """
         try:
-            torch.manual_seed(seed)
-            BATCH_SIZE = 64
-            dataset = InMemoryDataset(image_paths, self.transform)
-            
-            if len(dataset) == 0:
-                raise ValueError("Tidak ada gambar valid dalam daftar input")
-            
-            data_loader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=False)
+            image_format = self._image_format(image_format)
+            # Generator khusus, bukan RNG global, agar hasilnya bisa direproduksi dan aman antar thread
+            generator = torch.Generator().manual_seed(seed)
+
+            data_loader = DataLoader(dataset, batch_size=config.FINGERPRINT_BATCH_SIZE, shuffle=False)
 
             all_outputs = []
+            all_filenames = []
             all_fingerprints = []
             mse_losses = []
             bitwise_accuracy = 0
             total_images = 0
+            timings = {"decode_wait": 0.0, "inference": 0.0, "convert": 0.0, "encode_wait": 0.0}
+            total_start = time.perf_counter()
+
+            # Batch yang sedang di-encode di thread pool encoder: (nama file, future per gambar)
+            pending = deque()
+
+            def collect():
+                names, futures = pending.popleft()
+                wait_start = time.perf_counter()
+                try:
+                    encoded = [future.result() for future in futures]
+                except Exception as e:
+                    raise ValueError(f"Gagal meng-encode gambar pada batch {names[0]} - {names[-1]}: {str(e)}")
+                timings["encode_wait"] += time.perf_counter() - wait_start
+                all_outputs.extend(BytesIO(data) for data in encoded)
+                all_filenames.extend(names)
 
-            fingerprints = torch.randint(0, 2, (1, self.fingerprint_size), dtype=torch.float).to(self.device)
+            batches = iter(data_loader)
+            while True:
+                # Waktu menunggu decode; mendekati nol jika decode sudah tumpang tindih dengan inferensi
+                wait_start = time.perf_counter()
+                batch = next(batches, None)
+                timings["decode_wait"] += time.perf_counter() - wait_start
+                if batch is None:
+                    break
 
-            for images, indices in data_loader:
+                images, names = batch
+                if seeds is not None and getattr(dataset, "skipped", None):
+                    # Setelah ada gambar yang dilewati, seed tidak lagi bisa dipasangkan sesuai urutan
+                    raise ValueError(
+                        f"Gambar tidak valid ({', '.join(dataset.skipped)}) membuat seeds tidak sesuai urutan gambar"
+                    )
+                inference_start = time.perf_counter()
                 images = images.to(self.device)
                 batch_size = images.size(0)
+
+                batch_seeds = None
+                if seeds is not None:
+                    batch_seeds = seeds[total_images:total_images + batch_size]
+                    if len(batch_seeds) < batch_size:
+                        raise ValueError(f"Jumlah seed ({len(seeds)}) lebih sedikit dari jumlah gambar")
                 total_images += batch_size
 
-                fingerprints_batch = fingerprints.expand(batch_size, -1)
+                fingerprints_batch = self._draw_fingerprints(generator, batch_size, batch_seeds).to(self.device)
 
                 with torch.no_grad():
                     fingerprinted_images = self.encoder(fingerprints_batch, images)
@@ -123,30 +262,98 @@ class FingerprintService:
                     detected_fingerprints = self.decoder(fingerprinted_images)
                     detected_fingerprints = (detected_fingerprints > 0).long()
                     bitwise_accuracy += (detected_fingerprints == fingerprints_batch).float().mean(dim=1).sum().item()
+                timings["inference"] += time.perf_counter() - inference_start
+
+                # Satu konversi uint8 + transfer ke CPU untuk seluruh batch, lalu encode berjalan
+                # di thread pool selagi batch berikutnya diinferensi
+                convert_start = time.perf_counter()
+                batch_uint8 = tensor_to_uint8(fingerprinted_images)
+                timings["convert"] += time.perf_counter() - convert_start
+
+                pending.append((list(names), image_encoder.submit_many(list(batch_uint8), image_format)))
+                if len(pending) > config.ENCODE_PIPELINE_BATCHES:
+                    collect()
 
-                for i in range(fingerprinted_images.size(0)):
-                    buffer = BytesIO()
-                    try:
-                        save_image(fingerprinted_images[i].cpu(), buffer, format="PNG")
-                        buffer.seek(0)
-                        all_outputs.append(buffer)
-                    except Exception as e:
-                        raise ValueError(f"Gagal memproses gambar pada indeks {indices[i]}: {str(e)}")
-                    
-                all_fingerprints.extend([
-                    "".join(map(str, f.cpu().long().numpy().tolist()))
-                    for f in fingerprints
-                ])
+                all_fingerprints.extend(
+                    "".join(map(str, row.tolist())) for row in fingerprints_batch.to("cpu", torch.uint8).numpy()
+                )
+
+            while pending:
+                collect()
+
+            if total_images == 0:
+                raise ValueError("Tidak ada gambar valid dalam daftar input")
+            if seeds is not None and len(seeds) != total_images:
+                raise ValueError(f"Jumlah seed ({len(seeds)}) tidak sama dengan jumlah gambar valid ({total_images})")
 
             avg_mse_loss = sum(mse_losses) / len(mse_losses) if mse_losses else 0
             avg_bitwise_accuracy = bitwise_accuracy / total_images if total_images > 0 else 0
 
             metrics = {
                 "avg_mse_loss": avg_mse_loss,
-                "avg_bitwise_accuracy": avg_bitwise_accuracy
+                "avg_bitwise_accuracy": avg_bitwise_accuracy,
+                "timings": {
+                    **{f"{stage}_time": elapsed for stage, elapsed in timings.items()},
+                    "total_time": time.perf_counter() - total_start
+                },
+                "skipped_images": list(getattr(dataset, "skipped", []))
             }
 
-            return all_outputs, all_fingerprints, metrics
+            return all_outputs, all_filenames, all_fingerprints, metrics
         
         except Exception as e:
-            raise ValueError(f"Terjadi kesalahan saat memproses gambar: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Terjadi kesalahan saat memproses gambar: {str(e)}")
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def default_service() -> FingerprintService:
+    """FingerprintService milik proses ini, dibuat saat pertama kali dipakai (termasuk di proses worker)"""
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = FingerprintService(
+                encoder_path=config.FINGERPRINT_ENCODER_PATH,
+                decoder_path=config.FINGERPRINT_DECODER_PATH,
+                mmap=config.MMAP_WEIGHTS
+            )
+        return _default_service
+
+
+# Fungsi level modul agar bisa dijalankan lewat pool proses worker
+
+def embed(image_data: bytes, seed: int = 0, save_path: Optional[str] = None, image_format: Optional[str] = None):
+    return default_service().embed(BytesIO(image_data), seed=seed, save_path=save_path, image_format=image_format)
+
+
+def decode(image_data: bytes):
+    return default_service().decode(BytesIO(image_data))
+
+
+def decode_batch(image_paths: list, expected_fingerprint: Optional[str] = None):
+    return default_service().decode_batch(image_paths, expected_fingerprint)
+
+
+def embed_batch(image_paths: list, seed: int = 0, image_format: Optional[str] = None, seeds: Optional[list] = None):
+    service = default_service()
+    return service.embed_batch(
+        InMemoryDataset(image_paths, service.transform), seed=seed, image_format=image_format, seeds=seeds
+    )
+
+
+def embed_zip(zip_source, seed: int = 0, image_format: Optional[str] = None, seeds: Optional[list] = None):
+    # Jumlah seed dicocokkan dengan central directory sebelum ada gambar yang diproses
+    if seeds is not None:
+        image_count = ZipImageProcessor.count_images(zip_source)
+        if len(seeds) != image_count:
+            raise ValueError(f"Jumlah seed ({len(seeds)}) tidak sama dengan jumlah gambar dalam zip ({image_count})")
+
+    service = default_service()
+    return service.embed_batch(
+        ZipImageDataset(zip_source, service.transform), seed=seed, image_format=image_format, seeds=seeds
+    )
+
+
+def warmup(batch_size: int = 1):
+    default_service().warmup(batch_size)
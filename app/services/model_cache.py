@@ -0,0 +1,178 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+import torch
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Menghitung sha256 dari isi file model, atau seluruh file di dalamnya jika path berupa direktori"""
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        paths = [path]
+
+    for file_path in paths:
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def module_nbytes(module: torch.nn.Module) -> int:
+    """Estimasi memori yang dipakai parameter dan buffer sebuah modul"""
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+@dataclass
+class CachedModel:
+    model: torch.nn.Module
+    model_path: str
+    model_hash: str
+    nbytes: int
+    load_time: float
+
+
+class ModelCache:
+    def __init__(
+        self,
+        loader: Callable[[str], torch.nn.Module],
+        max_models: int = 4,
+        max_bytes: int = 2 * 1024 ** 3
+    ):
+        self.loader = loader
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[tuple, CachedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple, threading.Lock] = {}
+        self._hashes: dict[tuple, str] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_load_time = 0.0
+
+    @staticmethod
+    def _key(model_path: str) -> tuple:
+        # Model berupa direktori (serving artifact) dilacak lewat config.json yang ditulis terakhir
+        stat_path = os.path.join(model_path, "config.json") if os.path.isdir(model_path) else model_path
+        stat = os.stat(stat_path)
+        return (os.path.abspath(model_path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, model_path: str) -> CachedModel:
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model tidak ditemukan: {model_path}")
+
+        key = self._key(model_path)
+
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Satu thread yang memuat model, request lain untuk model yang sama menunggu
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+                self.misses += 1
+
+            start = time.perf_counter()
+            model = self.loader(model_path)
+            model_hash = self.model_hash(model_path)
+            load_time = time.perf_counter() - start
+
+            entry = CachedModel(
+                model=model,
+                model_path=model_path,
+                model_hash=model_hash,
+                nbytes=module_nbytes(model),
+                load_time=load_time
+            )
+
+            with self._lock:
+                self.total_load_time += load_time
+                self._drop_stale(key)
+                self._entries[key] = entry
+                self._evict(keep=key)
+                self._load_locks.pop(key, None)
+
+        return entry
+
+    def model_hash(self, model_path: str) -> str:
+        """Hash file model tanpa harus memuat modelnya, disimpan per (path, mtime, size)"""
+        key = self._key(model_path)
+        model_hash = self._hashes.get(key)
+        if model_hash is None:
+            model_hash = file_hash(model_path)
+            with self._lock:
+                for old_key in [k for k in self._hashes if k[0] == key[0]]:
+                    del self._hashes[old_key]
+                self._hashes[key] = model_hash
+        return model_hash
+
+    def _lookup(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _drop_stale(self, key: tuple):
+        # File model yang sama tetapi versi lama (mtime/size berbeda)
+        for old_key in [k for k in self._entries if k[0] == key[0] and k != key]:
+            del self._entries[old_key]
+            self.evictions += 1
+
+    def _evict(self, keep: tuple):
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models or self.total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            del self._entries[oldest]
+            self.evictions += 1
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "total_load_time": self.total_load_time,
+                "avg_load_time": self.total_load_time / self.misses if self.misses else 0.0,
+                "cached_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_models": self.max_models,
+                "models": [
+                    {
+                        "model_path": entry.model_path,
+                        "model_hash": entry.model_hash,
+                        "nbytes": entry.nbytes,
+                        "load_time": entry.load_time
+                    }
+                    for entry in self._entries.values()
+                ]
+            }
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import threading
+from typing import Callable, Optional
+
+import dnnlib
+import legacy
+import serving_artifact
+
+
+def read_metadata(model_path: str) -> dict:
+    """Metadata generator (resolusi, dimensi z/w, kondisi) tanpa memuat bobot jaringannya"""
+    if serving_artifact.is_serving_artifact(model_path):
+        with open(os.path.join(model_path, "config.json")) as f:
+            artifact_config = json.load(f)
+        metadata = {name: artifact_config.get(name) for name in legacy.metadata_fields}
+        metadata["nbytes"] = os.path.getsize(os.path.join(model_path, "weights.bin"))
+        return metadata
+
+    with dnnlib.util.open_url(model_path) as f:
+        return legacy.load_network_metadata(f)
+
+
+class ModelCatalog:
+    """Indeks model di direktori model beserta metadatanya, disimpan di disk dan disajikan dari memori
+
+    Refresh bersifat inkremental: hanya file yang (path, mtime, size)-nya berubah yang dibaca ulang.
+    """
+
+    def __init__(
+        self,
+        models_dir: str,
+        index_path: str,
+        extensions: tuple,
+        hasher: Callable[[str], str],
+        refresh_interval: float = 5.0
+    ):
+        self.models_dir = models_dir
+        self.index_path = index_path
+        self.extensions = extensions
+        self.hasher = hasher
+        self.refresh_interval = refresh_interval
+
+        # nama model -> metadata, termasuk "signature" untuk mendeteksi perubahan file
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._dir_mtime = None
+
+        self.refreshes = 0
+        self.extractions = 0
+
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _save_index(self):
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        # Nama unik per proses/thread agar penulis lain tidak menimpa file sementara yang sama
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _signature(model_path: str) -> list:
+        # Serving artifact dilacak lewat config.json yang ditulis terakhir, sama seperti ModelCache
+        stat_path = os.path.join(model_path, "config.json") if os.path.isdir(model_path) else model_path
+        stat = os.stat(stat_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _extract(self, name: str, model_path: str, signature: list) -> dict:
+        start = time.perf_counter()
+        entry = {"name": name, "signature": signature}
+        try:
+            entry.update(read_metadata(model_path))
+            entry["model_hash"] = self.hasher(model_path)
+            entry["conditional"] = bool(entry.get("c_dim"))
+            entry["error"] = None
+        except Exception as e:
+            entry["error"] = str(e)
+        entry["file_size"] = self._file_size(model_path)
+        entry["index_time"] = time.perf_counter() - start
+        self.extractions += 1
+        return entry
+
+    @staticmethod
+    def _file_size(model_path: str) -> int:
+        if not os.path.isdir(model_path):
+            return os.path.getsize(model_path)
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(model_path) for name in names
+        )
+
+    def refresh(self, force: bool = False):
+        """Sinkronisasi indeks dengan isi direktori model"""
+        with self._lock:
+            if not os.path.exists(self.models_dir):
+                raise FileNotFoundError("Direktori model tidak ditemukan")
+
+            dir_mtime = os.stat(self.models_dir).st_mtime_ns
+            fresh = time.time() - self._last_refresh < self.refresh_interval
+            if not force and fresh and dir_mtime == self._dir_mtime:
+                return
+
+            changed = False
+            names = sorted(f for f in os.listdir(self.models_dir) if f.endswith(self.extensions))
+            for name in set(self._entries) - set(names):
+                del self._entries[name]
+                changed = True
+
+            for name in names:
+                model_path = os.path.join(self.models_dir, name)
+                try:
+                    signature = self._signature(model_path)
+                except OSError:
+                    continue
+                entry = self._entries.get(name)
+                if entry is None or entry.get("signature") != signature:
+                    self._entries[name] = self._extract(name, model_path, signature)
+                    changed = True
+
+            if changed:
+                self._save_index()
+            self._dir_mtime = dir_mtime
+            self._last_refresh = time.time()
+            self.refreshes += 1
+
+    def record_load(self, name: str, load_time: float):
+        """Menyimpan biaya load terakhir yang teramati untuk model"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.get("load_time") != load_time:
+                entry["load_time"] = load_time
+                self._save_index()
+
+    def list(self) -> list[dict]:
+        self.refresh()
+        with self._lock:
+            return [
+                {key: value for key, value in entry.items() if key != "signature"}
+                for _, entry in sorted(self._entries.items())
+            ]
+
+    def get(self, name: str) -> Optional[dict]:
+        self.refresh()
+        with self._lock:
+            entry = self._entries.get(name)
+            return None if entry is None else {key: value for key, value in entry.items() if key != "signature"}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "models": len(self._entries),
+                "refreshes": self.refreshes,
+                "extractions": self.extractions,
+                "last_refresh": self._last_refresh
+            }
@@ -0,0 +1,78 @@
+import os
+import contextlib
+
+import torch
+
+from app import config
+from torch_utils.ops import bias_act
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def model_precision(model_name: str) -> str:
+    """Presisi inferensi untuk model, diambil dari MODEL_PRECISIONS berdasarkan nama tanpa ekstensi"""
+    name = os.path.splitext(os.path.basename(model_name))[0]
+    precision = config.MODEL_PRECISIONS.get(name, config.INFERENCE_PRECISION)
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi {precision} tidak dikenal, pilih salah satu dari {list(PRECISIONS)}")
+    return precision
+
+
+class QuantizedFullyConnected(torch.nn.Module):
+    """Pengganti FullyConnectedLayer StyleGAN2 dengan bobot int8 (dynamic quantization)"""
+
+    def __init__(self, layer: torch.nn.Module):
+        super().__init__()
+        weight = layer.weight.detach().float() * layer.weight_gain
+        linear = torch.nn.Linear(weight.shape[1], weight.shape[0], bias=layer.bias is not None)
+        with torch.no_grad():
+            linear.weight.copy_(weight)
+            if layer.bias is not None:
+                linear.bias.copy_(layer.bias.detach().float() * layer.bias_gain)
+
+        # Bias dan weight gain sudah dilebur ke dalam Linear, sisanya hanya aktivasi
+        quantized = torch.ao.quantization.quantize_dynamic(
+            torch.nn.Sequential(linear), {torch.nn.Linear}, dtype=torch.qint8
+        )
+        self.linear = quantized[0]
+        self.activation = layer.activation
+
+    def forward(self, x):
+        x = self.linear(x.to(torch.float32))
+        if self.activation != 'linear':
+            x = bias_act.bias_act(x, act=self.activation)
+        return x
+
+
+def quantize_mapping(G) -> int:
+    """Mengganti semua FullyConnectedLayer di mapping network dengan versi int8, mengembalikan jumlahnya"""
+    targets = [
+        name for name, module in G.mapping.named_modules()
+        if type(module).__name__ == 'FullyConnectedLayer'
+    ]
+    for name in targets:
+        parent_name, _, attr = name.rpartition('.')
+        parent = G.mapping.get_submodule(parent_name) if parent_name else G.mapping
+        setattr(parent, attr, QuantizedFullyConnected(getattr(parent, attr)))
+    return len(targets)
+
+
+def apply_precision(G, precision: str):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi {precision} tidak dikenal, pilih salah satu dari {list(PRECISIONS)}")
+
+    if precision == "int8":
+        if next(G.parameters()).device.type != "cpu":
+            raise ValueError("Presisi int8 hanya didukung di CPU")
+        quantize_mapping(G)
+
+    G.inference_precision = precision
+    return G
+
+
+def precision_context(G):
+    """Autocast bfloat16 untuk model dengan presisi bf16, selain itu tidak melakukan apa-apa"""
+    if getattr(G, 'inference_precision', "fp32") != "bf16":
+        return contextlib.nullcontext()
+    device = next(G.parameters()).device
+    return torch.autocast(device_type=device.type, dtype=torch.bfloat16)
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class ResultCache:
+    """Cache hasil generate yang disimpan berdasarkan hash isi file (content-addressed)
+
+    Beberapa key dapat menunjuk ke file yang sama; file baru dihapus ketika
+    tidak ada lagi key yang mereferensikannya.
+    """
+
+    INDEX_FILENAME = "index.json"
+
+    def __init__(self, root_dir: str, max_bytes: int = 1024 ** 3, ttl: float = 0):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # key -> {"path", "content_hash", "nbytes", "created_at"}
+        self._index: "OrderedDict[str, dict]" = OrderedDict()
+        self._refcount: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(*parts: Hashable) -> str:
+        return "|".join(str(part) for part in parts)
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root_dir, self.INDEX_FILENAME)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path()) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        for key, entry in entries:
+            if os.path.exists(entry["path"]):
+                self._index[key] = entry
+                self._refcount[entry["content_hash"]] = self._refcount.get(entry["content_hash"], 0) + 1
+
+    def _save_index(self):
+        """Indeks hanya optimasi restart: gagal menulisnya tidak boleh menggagalkan request"""
+        tmp_path = f"{self._index_path()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.root_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(list(self._index.items()), f)
+            os.replace(tmp_path, self._index_path())
+        except OSError as e:
+            print(f"Peringatan: Gagal menyimpan indeks result cache: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _expired(self, entry: dict) -> bool:
+        return self.ttl > 0 and time.time() - entry["created_at"] > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and (self._expired(entry) or not os.path.exists(entry["path"])):
+                self._remove(key)
+                self._save_index()
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._index.move_to_end(key)
+            self.hits += 1
+            return entry["path"]
+
+    def put(self, key: str, data: bytes, ext: str) -> str:
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.root_dir, f"{content_hash}.{ext}")
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(self.root_dir, exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+            entry = self._index.get(key)
+            if entry is not None and entry["content_hash"] == content_hash:
+                # Isi sama (misalnya dua cache miss bersamaan): cukup perbarui entry yang ada
+                entry["created_at"] = time.time()
+                self._index.move_to_end(key)
+                self._save_index()
+                return path
+
+            # Refcount isi baru dinaikkan dulu agar _remove tidak menghapus file yang baru ditulis
+            self._refcount[content_hash] = self._refcount.get(content_hash, 0) + 1
+            if entry is not None:
+                self._remove(key)
+            self._index[key] = {
+                "path": path,
+                "content_hash": content_hash,
+                "nbytes": len(data),
+                "created_at": time.time()
+            }
+
+            self._evict(keep=key)
+            self._save_index()
+
+        return path
+
+    def _remove(self, key: str):
+        entry = self._index.pop(key)
+        content_hash = entry["content_hash"]
+        self._refcount[content_hash] -= 1
+        if self._refcount[content_hash] <= 0:
+            del self._refcount[content_hash]
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        # File yang sama hanya dihitung sekali
+        sizes = {entry["content_hash"]: entry["nbytes"] for entry in self._index.values()}
+        return sum(sizes.values())
+
+    def _evict(self, keep: str):
+        for key in [k for k, entry in self._index.items() if k != keep and self._expired(entry)]:
+            self._remove(key)
+            self.evictions += 1
+
+        while self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._index))
+            if oldest == keep:
+                break
+            self._remove(oldest)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "files": len(self._refcount),
+                "cached_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
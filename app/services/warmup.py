@@ -0,0 +1,119 @@
+import os
+import time
+import asyncio
+import functools
+from typing import Callable
+
+from app import config
+from app.models import stylegan
+from app.services import fingerprinting
+from app.services.worker_pool import run_everywhere
+
+
+class WarmupState:
+    """Status warm-up: "degraded" berarti sebagian langkah gagal tetapi service tetap bisa melayani"""
+
+    def __init__(self):
+        self.status = "pending"
+        self.started_at = None
+        self.finished_at = None
+        self.steps = []
+        self.errors = []
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "degraded")
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration": (self.finished_at or time.time()) - self.started_at if self.started_at else None,
+            "steps": self.steps,
+            "errors": self.errors
+        }
+
+
+warmup_state = WarmupState()
+
+
+def run_until_steady(fn: Callable[[], None], max_iterations: int, tolerance: float) -> list[float]:
+    """Menjalankan fn berulang sampai latensi dua iterasi berturut-turut stabil"""
+    latencies = []
+    for _ in range(max(1, max_iterations)):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+        if len(latencies) >= 2 and abs(latencies[-1] - latencies[-2]) <= tolerance * latencies[-2]:
+            break
+    return latencies
+
+
+def _warmup_models() -> list[str]:
+    if config.WARMUP_MODELS:
+        return config.WARMUP_MODELS
+    if not os.path.exists(config.MODELS_DIR):
+        return []
+    return stylegan.list_model_names()
+
+
+async def _warmup_step(name: str, batch_size: int, fn: Callable[[], None]) -> bool:
+    # Setiap proses worker punya model dan cache kernel sendiri, jadi semuanya dipanaskan
+    attempts = max(0, config.WARMUP_RETRIES) + 1
+    for attempt in range(attempts):
+        try:
+            results = await run_everywhere(
+                run_until_steady, fn, config.WARMUP_MAX_ITERATIONS, config.WARMUP_STEADY_TOLERANCE
+            )
+        except Exception as e:
+            error = e
+            if attempt + 1 < attempts:
+                await asyncio.sleep(config.WARMUP_RETRY_BACKOFF * 2 ** attempt)
+            continue
+
+        for worker_id, latencies in enumerate(results):
+            warmup_state.steps.append({
+                "target": name,
+                "batch_size": batch_size,
+                "worker": worker_id,
+                "iterations": len(latencies),
+                "first_latency": latencies[0],
+                "steady_latency": latencies[-1]
+            })
+        return True
+
+    warmup_state.errors.append({"target": name, "batch_size": batch_size, "attempts": attempts, "error": str(error)})
+    return False
+
+
+async def run_warmup(warmup_fingerprinting: bool = True):
+    warmup_state.started_at = time.time()
+
+    if not config.WARMUP_ENABLED:
+        warmup_state.status = "ready"
+        warmup_state.finished_at = time.time()
+        return warmup_state
+
+    warmup_state.status = "warming"
+
+    if warmup_fingerprinting:
+        for batch_size in config.WARMUP_FINGERPRINT_BATCH_SIZES:
+            await _warmup_step("fingerprinting", batch_size, functools.partial(fingerprinting.warmup, batch_size))
+
+    for model_name in _warmup_models():
+        for batch_size in config.WARMUP_BATCH_SIZES:
+            await _warmup_step(
+                model_name, batch_size, functools.partial(stylegan.warmup_model, model_name, batch_size)
+            )
+
+    warmup_state.finished_at = time.time()
+    if not warmup_state.errors:
+        warmup_state.status = "ready"
+    elif warmup_state.steps:
+        warmup_state.status = "degraded"
+    else:
+        warmup_state.status = "failed"
+    print(f"Warm-up selesai dengan status {warmup_state.status} dalam {warmup_state.finished_at - warmup_state.started_at:.2f} detik")
+    return warmup_state
@@ -0,0 +1,287 @@
+import os
+import time
+import queue
+import pickle
+import asyncio
+import itertools
+import threading
+import traceback
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from multiprocessing.reduction import ForkingPickler
+
+from app import config
+from app.services.executor import run_inference
+
+# True di dalam proses worker pool; state bersama di disk hanya ditulis oleh proses utama
+_in_worker = False
+
+
+class _SharedArray:
+    """Penanda array numpy yang dikirim sebagai tensor shared memory lalu dikembalikan lagi ke numpy"""
+
+    def __init__(self, tensor: torch.Tensor):
+        self.tensor = tensor
+
+
+def _to_transport(obj):
+    if isinstance(obj, np.ndarray) and obj.dtype != object:
+        return _SharedArray(torch.from_numpy(np.ascontiguousarray(obj)))
+    if isinstance(obj, list):
+        return [_to_transport(v) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(_to_transport(v) for v in obj)
+    if isinstance(obj, dict):
+        return {k: _to_transport(v) for k, v in obj.items()}
+    return obj
+
+
+def _from_transport(obj):
+    if isinstance(obj, _SharedArray):
+        return obj.tensor.numpy()
+    if isinstance(obj, list):
+        return [_from_transport(v) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(_from_transport(v) for v in obj)
+    if isinstance(obj, dict):
+        return {k: _from_transport(v) for k, v in obj.items()}
+    return obj
+
+
+def _worker_main(worker_id: int, cores: list, tasks, results):
+    """Loop proses worker: dipin ke subset core dan menjalankan fungsi yang dikirim lewat antrian"""
+    global _in_worker
+    _in_worker = True
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(max(1, len(cores)))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        task_id, fn, args, kwargs = task
+        start = time.perf_counter()
+        try:
+            result = fn(*_from_transport(args), **_from_transport(kwargs))
+            # Di-pickle di sini: kegagalan di thread feeder Queue tidak pernah sampai ke proses utama
+            payload = ForkingPickler.dumps(_to_transport(result))
+            ok = True
+        except Exception as e:
+            # Exception aslinya belum tentu bisa di-pickle, jadi dikirim sebagai teks
+            message = f"{type(e).__name__}: {e}"
+            payload = ForkingPickler.dumps((message, traceback.format_exc()))
+            ok = False
+        results.put((worker_id, task_id, ok, bytes(payload), time.perf_counter() - start))
+
+
+class _Worker:
+    def __init__(self, worker_id: int, cores: list):
+        self.worker_id = worker_id
+        self.cores = cores
+        self.process = None
+        self.tasks = None
+        self.pending: dict[int, tuple] = {}
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.total_run_time = 0.0
+
+
+class WorkerPool:
+    """Pool proses inferensi; tensor dan array dikirim lewat shared memory (torch.multiprocessing), bukan di-pickle"""
+
+    # Interval (detik) pemeriksaan worker yang mati
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, num_workers: int, cores_per_worker: int = 0):
+        self.num_workers = num_workers
+        self.cores_per_worker = cores_per_worker
+
+        self._ctx = mp.get_context("spawn")
+        self._workers: list[_Worker] = []
+        self._results = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._started = False
+        self._stopping = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.num_workers > 0
+
+    def _core_sets(self) -> list:
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        per_worker = self.cores_per_worker or max(1, len(cores) // self.num_workers)
+        return [
+            [cores[(i * per_worker + j) % len(cores)] for j in range(per_worker)]
+            for i in range(self.num_workers)
+        ]
+
+    def _spawn(self, worker: _Worker):
+        worker.tasks = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.worker_id, worker.cores, worker.tasks, self._results),
+            name=f"inference-worker-{worker.worker_id}",
+            daemon=True
+        )
+        worker.process.start()
+
+    def start(self):
+        with self._lock:
+            if self._started or not self.enabled:
+                return
+            self._results = self._ctx.Queue()
+            self._workers = [_Worker(i, cores) for i, cores in enumerate(self._core_sets())]
+            for worker in self._workers:
+                self._spawn(worker)
+            self._reader = threading.Thread(target=self._read_results, name="worker-pool-results", daemon=True)
+            self._reader.start()
+            self._started = True
+
+    def _resolve(self, future, ok: bool, value):
+        if future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(RuntimeError(value))
+
+    def _read_results(self):
+        last_check = time.monotonic()
+        while not self._stopping:
+            try:
+                item = self._results.get(timeout=self.CHECK_INTERVAL)
+            except queue.Empty:
+                item = None
+
+            # Diperiksa berkala, bukan hanya saat antrian hasil kosong, karena worker lain bisa terus mengirim hasil
+            if time.monotonic() - last_check >= self.CHECK_INTERVAL:
+                self._check_workers()
+                last_check = time.monotonic()
+            if item is None:
+                continue
+
+            worker_id, task_id, ok, payload, run_time = item
+            try:
+                payload = pickle.loads(payload)
+            except Exception as e:
+                ok, payload = False, (f"Hasil dari worker tidak bisa dibaca: {type(e).__name__}: {e}", "")
+
+            with self._lock:
+                worker = self._workers[worker_id]
+                loop, future = worker.pending.pop(task_id, (None, None))
+                worker.total_run_time += run_time
+                if ok:
+                    worker.completed += 1
+                else:
+                    worker.failed += 1
+            if future is None:
+                continue
+
+            value = _from_transport(payload) if ok else payload[0]
+            loop.call_soon_threadsafe(self._resolve, future, ok, value)
+
+    def _check_workers(self):
+        """Worker yang mati dijalankan ulang; request yang sedang ditanganinya dianggap gagal"""
+        with self._lock:
+            for worker in self._workers:
+                if worker.process.is_alive() or self._stopping:
+                    continue
+                pending, worker.pending = worker.pending, {}
+                worker.restarts += 1
+                self._spawn(worker)
+                for loop, future in pending.values():
+                    loop.call_soon_threadsafe(
+                        self._resolve, future, False, f"Worker {worker.worker_id} berhenti saat memproses request"
+                    )
+
+    async def run(self, fn, *args, worker_id=None, **kwargs):
+        """Menjalankan fn di worker dengan antrian paling pendek (atau worker tertentu)"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        task = (next(self._task_ids), fn, _to_transport(args), _to_transport(kwargs))
+
+        with self._lock:
+            if worker_id is None:
+                worker = min(self._workers, key=lambda w: len(w.pending))
+            else:
+                worker = self._workers[worker_id]
+            worker.pending[task[0]] = (loop, future)
+            worker.tasks.put(task)
+        return await future
+
+    async def run_on_all(self, fn, *args, **kwargs) -> list:
+        """Menjalankan fn sekali di setiap worker, misalnya untuk warm-up"""
+        self.start()
+        return await asyncio.gather(*(
+            self.run(fn, *args, worker_id=worker.worker_id, **kwargs) for worker in self._workers
+        ))
+
+    def shutdown(self):
+        with self._lock:
+            if not self._started:
+                return
+            self._stopping = True
+            for worker in self._workers:
+                worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._started = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "num_workers": self.num_workers,
+                "workers": [
+                    {
+                        "worker_id": worker.worker_id,
+                        "pid": worker.process.pid if worker.process else None,
+                        "alive": worker.process.is_alive() if worker.process else False,
+                        "cores": worker.cores,
+                        "queue_depth": len(worker.pending),
+                        "completed": worker.completed,
+                        "failed": worker.failed,
+                        "restarts": worker.restarts,
+                        "avg_run_time": worker.total_run_time / (worker.completed + worker.failed)
+                        if worker.completed + worker.failed else 0.0
+                    }
+                    for worker in self._workers
+                ]
+            }
+
+
+worker_pool = WorkerPool(
+    num_workers=config.WORKER_PROCESSES,
+    cores_per_worker=config.WORKER_CORES
+)
+
+
+def in_worker() -> bool:
+    return _in_worker
+
+
+async def run_in_worker(fn, *args, **kwargs):
+    """Inferensi berat: di pool proses jika WORKER_PROCESSES > 0, selain itu di thread pool biasa
+
+    fn harus fungsi level modul agar bisa dikirim ke proses worker.
+    """
+    if worker_pool.enabled:
+        return await worker_pool.run(fn, *args, **kwargs)
+    return await run_inference(fn, *args, **kwargs)
+
+
+async def run_everywhere(fn, *args, **kwargs) -> list:
+    """Menjalankan fn di setiap proses worker, atau sekali di proses ini jika pool tidak aktif"""
+    if worker_pool.enabled:
+        return await worker_pool.run_on_all(fn, *args, **kwargs)
+    return [await run_inference(fn, *args, **kwargs)]
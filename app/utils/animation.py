@@ -0,0 +1,225 @@
+import struct
+import zipfile
+import zlib
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# Setiap writer menerima frame satu per satu dan langsung mengembalikan byte yang siap dikirim,
+# sehingga memori tidak bertambah seiring jumlah frame.
+
+
+class GifWriter:
+    media_type = "image/gif"
+    extension = "gif"
+
+    def __init__(self, num_frames: int, fps: float, loop: bool = True):
+        self.delay = max(1, round(100 / fps))
+        self.loop = loop
+        self.started = False
+
+    def _header(self, width: int, height: int) -> bytes:
+        header = b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0)
+        if self.loop:
+            header += b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", 0) + b"\x00"
+        return header
+
+    @staticmethod
+    def _frame_blocks(data: bytes) -> bytes:
+        """Mengambil image descriptor dan data LZW dari GIF satu frame; global color table dijadikan local"""
+        flags = data[10]
+        pos = 13
+        table = b""
+        if flags & 0x80:
+            size = 3 << ((flags & 0x07) + 1)
+            table = data[pos:pos + size]
+            pos += size
+
+        # Lewati extension block (graphics control, comment, dll.)
+        while data[pos] == 0x21:
+            pos += 2
+            while data[pos]:
+                pos += data[pos] + 1
+            pos += 1
+
+        descriptor = bytearray(data[pos:pos + 10])
+        if table and not descriptor[9] & 0x80:
+            descriptor[9] = (descriptor[9] & 0x78) | 0x80 | (flags & 0x07)
+        else:
+            table = b""
+        return bytes(descriptor) + table + data[pos + 10:].rstrip(b";")
+
+    def add_frame(self, img: np.ndarray) -> bytes:
+        buffer = BytesIO()
+        Image.fromarray(img, "RGB").save(buffer, format="GIF")
+
+        chunk = b""
+        if not self.started:
+            chunk += self._header(img.shape[1], img.shape[0])
+            self.started = True
+
+        control = b"\x21\xf9\x04\x00" + struct.pack("<H", self.delay) + b"\x00\x00"
+        return chunk + control + self._frame_blocks(buffer.getvalue())
+
+    def close(self) -> bytes:
+        return b";"
+
+
+def _png_chunks(data: bytes):
+    pos = 8
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        yield data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]
+        pos += length + 12
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+class ApngWriter:
+    media_type = "image/apng"
+    extension = "png"
+
+    def __init__(self, num_frames: int, fps: float, loop: bool = True, compress_level: int = 6):
+        self.num_frames = num_frames
+        self.delay = (max(1, round(1000 / fps)), 1000)
+        self.loop = loop
+        self.compress_level = compress_level
+        self.sequence = 0
+        self.frame_index = 0
+
+    def add_frame(self, img: np.ndarray) -> bytes:
+        buffer = BytesIO()
+        Image.fromarray(img, "RGB").save(buffer, format="PNG", compress_level=self.compress_level)
+        chunks = list(_png_chunks(buffer.getvalue()))
+
+        out = []
+        if self.frame_index == 0:
+            # Jumlah frame harus diketahui di awal (acTL)
+            ihdr = next(data for chunk_type, data in chunks if chunk_type == b"IHDR")
+            out.append(b"\x89PNG\r\n\x1a\n")
+            out.append(_png_chunk(b"IHDR", ihdr))
+            out.append(_png_chunk(b"acTL", struct.pack(">II", self.num_frames, 0 if self.loop else 1)))
+
+        height, width = img.shape[:2]
+        out.append(_png_chunk(b"fcTL", struct.pack(
+            ">IIIIIHHBB", self.sequence, width, height, 0, 0, *self.delay, 0, 0
+        )))
+        self.sequence += 1
+
+        for chunk_type, data in chunks:
+            if chunk_type != b"IDAT":
+                continue
+            if self.frame_index == 0:
+                out.append(_png_chunk(b"IDAT", data))
+            else:
+                out.append(_png_chunk(b"fdAT", struct.pack(">I", self.sequence) + data))
+                self.sequence += 1
+
+        self.frame_index += 1
+        return b"".join(out)
+
+    def close(self) -> bytes:
+        return _png_chunk(b"IEND", b"")
+
+
+def _riff_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return chunk_type + struct.pack("<I", len(data)) + data + b"\x00" * (len(data) % 2)
+
+
+class WebpWriter:
+    """Container RIFF membutuhkan ukuran total di header, jadi WebP baru dikirim setelah frame terakhir.
+
+    Yang disimpan di memori hanya frame yang sudah terkompresi.
+    """
+    media_type = "image/webp"
+    extension = "webp"
+
+    def __init__(self, num_frames: int, fps: float, loop: bool = True, quality: int = 90):
+        self.duration = max(1, round(1000 / fps))
+        self.loop = loop
+        self.quality = quality
+        self.size = None
+        self.frames = []
+
+    def add_frame(self, img: np.ndarray) -> bytes:
+        buffer = BytesIO()
+        Image.fromarray(img, "RGB").save(buffer, format="WEBP", quality=self.quality)
+        data = buffer.getvalue()
+
+        # Ambil bitstream VP8/VP8L (dan ALPH jika ada) dari WebP satu frame
+        bitstream = b""
+        pos = 12
+        while pos < len(data):
+            chunk_type = data[pos:pos + 4]
+            length, = struct.unpack("<I", data[pos + 4:pos + 8])
+            if chunk_type != b"VP8X":
+                bitstream += _riff_chunk(chunk_type, data[pos + 8:pos + 8 + length])
+            pos += 8 + length + length % 2
+
+        height, width = img.shape[:2]
+        self.size = (width, height)
+        header = b"\x00" * 6 + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+        header += self.duration.to_bytes(3, "little") + b"\x02"
+        self.frames.append(_riff_chunk(b"ANMF", header + bitstream))
+        return b""
+
+    def close(self) -> bytes:
+        width, height = self.size
+        vp8x = b"\x02\x00\x00\x00" + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+        anim = b"\x00\x00\x00\x00" + struct.pack("<H", 0 if self.loop else 1)
+        body = b"WEBP" + _riff_chunk(b"VP8X", vp8x) + _riff_chunk(b"ANIM", anim) + b"".join(self.frames)
+        self.frames = []
+        return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class _Sink:
+    """File tujuan tanpa seek; zipfile otomatis memakai data descriptor untuk stream seperti ini"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ZipWriter:
+    media_type = "application/zip"
+    extension = "zip"
+
+    def __init__(self, num_frames: int, fps: float, loop: bool = True):
+        self.digits = len(str(max(num_frames - 1, 0)))
+        self.frame_index = 0
+        self.sink = _Sink()
+        # PNG sudah terkompresi, jadi disimpan tanpa kompresi tambahan
+        self.archive = zipfile.ZipFile(self.sink, "w", compression=zipfile.ZIP_STORED)
+
+    def add_frame(self, img: np.ndarray) -> bytes:
+        buffer = BytesIO()
+        Image.fromarray(img, "RGB").save(buffer, format="PNG")
+        self.archive.writestr(f"frame_{self.frame_index:0{self.digits}d}.png", buffer.getvalue())
+        self.frame_index += 1
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.archive.close()
+        return self.sink.drain()
+
+
+ANIMATION_WRITERS = {
+    "gif": GifWriter,
+    "apng": ApngWriter,
+    "webp": WebpWriter,
+    "zip": ZipWriter,
+}
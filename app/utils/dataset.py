@@ -1,27 +1,123 @@
-from torch.utils.data import Dataset
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from torch.utils.data import IterableDataset
 from PIL import Image
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 
-class InMemoryDataset(Dataset):
-    def __init__(self, image_paths: List[str], transform):
-        self.image_paths = []
-        self.transform = transform
-        for path in image_paths:
-            try:
-                with Image.open(path) as img:
-                    img.convert("RGB").verify()
-                self.image_paths.append(path)
-            except Exception as e:
-                print(f"Peringatan: Melewati gambar tidak valid: {str(e)}")
-        if not self.image_paths:
-            raise ValueError("Tidak ada gambar valid dalam daftar input")
+from app import config
+from app.utils.zip_processor import ZipImageProcessor
+
+
+def _load_image(source, transform):
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    with Image.open(source) as img:
+        return transform(img.convert("RGB"))
+
+
+class ImageLoader:
+    """Thread pool untuk decode + transform gambar; Pillow melepas GIL selama decode dan resize"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="decode")
+        self._lock = threading.Lock()
 
-    def __getitem__(self, idx):
+        self.decoded = 0
+        self.failed = 0
+
+    def _load(self, source, transform):
         try:
-            img = Image.open(self.image_paths[idx]).convert("RGB")
-            return self.transform(img), idx
+            tensor = _load_image(source, transform)
         except Exception as e:
-            raise ValueError(f"Gagal memproses gambar pada indeks {idx}: {str(e)}")
+            with self._lock:
+                self.failed += 1
+            return None, e
+        with self._lock:
+            self.decoded += 1
+        return tensor, None
+
+    def iter_decoded(self, items: Iterable[tuple], transform, prefetch: int) -> Iterator[tuple]:
+        """Menghasilkan (nama, tensor, error) sesuai urutan input
+
+        Paling banyak `prefetch` gambar didecode di depan konsumen, jadi batch berikutnya
+        sudah didecode selagi batch saat ini diinferensi tanpa menampung seluruh input di memori.
+        """
+        pending = deque()
+        for name, source in items:
+            pending.append((name, self._pool.submit(self._load, source, transform)))
+            if len(pending) >= prefetch:
+                name, future = pending.popleft()
+                yield (name, *future.result())
+        while pending:
+            name, future = pending.popleft()
+            yield (name, *future.result())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "decoded": self.decoded,
+                "failed": self.failed
+            }
+
+
+image_loader = ImageLoader(max_workers=config.DECODE_WORKERS)
+
+
+def _default_prefetch() -> int:
+    return config.FINGERPRINT_BATCH_SIZE * config.DECODE_PREFETCH_BATCHES
+
+
+class InMemoryDataset(IterableDataset):
+    """Setiap gambar didecode tepat sekali; tensor hasil transform disimpan untuk iterasi berikutnya
+
+    Gambar yang tidak valid dicatat di `skipped` saat pertama kali ditemui, tanpa verifikasi terpisah.
+    """
+
+    def __init__(self, image_paths: List[str], transform, prefetch: Optional[int] = None):
+        if not image_paths:
+            raise ValueError("Tidak ada gambar valid dalam daftar input")
+        self.image_paths = list(image_paths)
+        self.transform = transform
+        self.prefetch = prefetch or _default_prefetch()
+        self.skipped = []
+        self._items = []
+        self._complete = False
+
+    def __iter__(self):
+        if self._complete:
+            yield from self._items
+            return
+
+        self._items, self.skipped = [], []
+        items = ((os.path.basename(path), path) for path in self.image_paths)
+        for name, tensor, error in image_loader.iter_decoded(items, self.transform, self.prefetch):
+            if error is not None:
+                print(f"Peringatan: Melewati gambar tidak valid {name}: {str(error)}")
+                self.skipped.append(name)
+                continue
+            self._items.append((tensor, name))
+            yield tensor, name
+        self._complete = True
+
+class ZipImageDataset(IterableDataset):
+    """Gambar dari arsip zip yang didecode saat dibaca, sehingga batch pertama siap tanpa menunggu seluruh arsip"""
+
+    def __init__(self, zip_source, transform, prefetch: Optional[int] = None):
+        self.zip_source = zip_source
+        self.transform = transform
+        self.prefetch = prefetch or _default_prefetch()
+        self.skipped = []
 
-    def __len__(self):
-        return len(self.image_paths)
\ No newline at end of file
+    def __iter__(self):
+        items = ZipImageProcessor.iter_images(self.zip_source)
+        for name, tensor, error in image_loader.iter_decoded(items, self.transform, self.prefetch):
+            if error is not None:
+                print(f"Peringatan: Melewati gambar tidak valid {name}: {str(error)}")
+                self.skipped.append(name)
+                continue
+            yield tensor, name
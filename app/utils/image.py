@@ -17,4 +17,13 @@ def save_base64_image(base64_string, save_path):
     os.makedirs(os.path.dirname(save_path), exist_ok=True)
     
     img.save(save_path)
-    return save_path
\ No newline at end of file
+    return save_path
+
+def path_to_url(path):
+    """Mengubah path file di bawah direktori static menjadi URL"""
+    return "/" + path.replace(os.sep, "/")
+
+def read_bytes(path):
+    """Membaca isi file sebagai bytes"""
+    with open(path, "rb") as f:
+        return f.read()
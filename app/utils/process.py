@@ -0,0 +1,24 @@
+import os
+import resource
+
+
+def memory_stats() -> dict:
+    """RSS proses saat ini; bagian shared berasal dari halaman file seperti bobot model yang di-mmap"""
+    stats = {
+        "pid": os.getpid(),
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    }
+
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(v) for v in f.read().split()[:3])
+    except OSError:
+        return stats
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    stats.update({
+        "rss_bytes": resident * page_size,
+        "shared_bytes": shared * page_size,
+        "private_bytes": (resident - shared) * page_size
+    })
+    return stats
@@ -1,6 +1,10 @@
-from fastapi.responses import JSONResponse
+import json
+import uuid
+from fastapi.responses import JSONResponse, Response
 from typing import Any, Optional
 
+RESPONSE_MODES = ("url", "image", "multipart")
+
 def success_response(
         message: str,
         data: Optional[Any] = None,
@@ -27,4 +31,47 @@ def error_response(
             "message": message,
             "detail": detail
         }
-    )
\ No newline at end of file
+    )
+
+def image_response(
+        data: bytes,
+        media_type: str = "image/png",
+        headers: Optional[dict] = None
+) -> Response:
+    return Response(content=data, media_type=media_type, headers=headers)
+
+def multipart_response(
+        message: str,
+        data: Any,
+        image: bytes,
+        filename: str,
+        media_type: str = "image/png",
+        extra_images: Optional[list] = None
+) -> Response:
+    """Mengirim metadata JSON dan gambar sekaligus dalam satu response multipart/mixed
+
+    extra_images berisi pasangan (filename, bytes) yang dikirim sebagai part tambahan setelah gambar utama.
+    """
+    boundary = uuid.uuid4().hex
+    metadata = json.dumps({
+        "status": "success",
+        "message": message,
+        "data": data
+    }).encode("utf-8")
+
+    parts = [
+        f"--{boundary}\r\n".encode(),
+        b"Content-Type: application/json\r\n\r\n",
+        metadata,
+    ]
+    for part_filename, part in [(filename, image)] + list(extra_images or []):
+        parts += [
+            f"\r\n--{boundary}\r\n".encode(),
+            f"Content-Type: {media_type}\r\n".encode(),
+            f'Content-Disposition: attachment; filename="{part_filename}"\r\n\r\n'.encode(),
+            part,
+        ]
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    body = b"".join(parts)
+
+    return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}")
@@ -1,43 +1,70 @@
 import os
 import zipfile
-import tempfile
 import json
 from io import BytesIO
+from typing import Iterator
+
+from app import config
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
 
 class ZipImageProcessor:
     @staticmethod
-    def extract_images(
-        zip_file: BytesIO,
-        tmp_dir: str
-    ):
+    def _check_limits(entries: list, members: list):
+        # Ukuran di central directory cukup dipercaya: zipfile berhenti membaca di file_size
+        # yang dideklarasikan dan memeriksa CRC, jadi header palsu tidak bisa melewati batas ini
+        if len(entries) > config.ZIP_MAX_MEMBERS:
+            raise ValueError(f"Zip berisi {len(entries)} file, maksimal {config.ZIP_MAX_MEMBERS}")
+
+        total_size = 0
+        for info in members:
+            if info.file_size > config.ZIP_MAX_MEMBER_BYTES:
+                raise ValueError(f"Ukuran {info.filename} melebihi batas {config.ZIP_MAX_MEMBER_BYTES} byte")
+            if info.compress_size and info.file_size / info.compress_size > config.ZIP_MAX_COMPRESSION_RATIO:
+                raise ValueError(f"Rasio kompresi {info.filename} tidak wajar")
+            total_size += info.file_size
+
+        if total_size > config.ZIP_MAX_TOTAL_BYTES:
+            raise ValueError(f"Total ukuran gambar dalam zip melebihi batas {config.ZIP_MAX_TOTAL_BYTES} byte")
+
+    @staticmethod
+    def _image_members(archive: zipfile.ZipFile) -> list:
+        """Member gambar dari central directory, setelah batas arsip diperiksa"""
+        entries = archive.infolist()
+        members = [
+            info for info in entries
+            if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        if not members:
+            raise ValueError("Tidak ada gambar valid dalam zip")
+        ZipImageProcessor._check_limits(entries, members)
+        return members
+
+    @staticmethod
+    def count_images(zip_source) -> int:
+        """Jumlah member gambar, hanya dari central directory tanpa mendekompresi apa pun"""
+        try:
+            with zipfile.ZipFile(zip_source) as archive:
+                return len(ZipImageProcessor._image_members(archive))
+        except zipfile.BadZipFile:
+            raise ValueError("File zip tidak valid atau rusak")
+
+    @staticmethod
+    def iter_images(zip_source) -> Iterator[tuple[str, bytes]]:
+        """Membaca member gambar satu per satu langsung dari arsip, tanpa ekstraksi ke disk
+
+        zip_source berupa path atau file object yang bisa di-seek (misalnya upload yang di-spool).
+        Member selain gambar dilewati tanpa didekompresi.
+        """
         try:
-            zip_path = os.path.join(tmp_dir, "input.zip")
-            with open(zip_path, "wb") as f:
-                f.write(zip_file.read())
-
-            extracted_path = os.path.join(tmp_dir, "extracted")
-            os.makedirs(extracted_path, exist_ok=True)
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(extracted_path)
-
-            image_paths = []
-            image_filenames = []
-            for root, _, files in os.walk(extracted_path):
-                for name in files:
-                    if name.lower().endswith(('.png', '.jpg', '.jpeg')):
-                        file_path = os.path.join(root, name)
-                        image_paths.append(file_path)
-                        image_filenames.append(name)
-                    
-            if not image_paths:
-                raise ValueError("Tidak ada gambar valid dalam zip")
-            
-            return image_paths, image_filenames
-        
+            with zipfile.ZipFile(zip_source) as archive:
+                for info in ZipImageProcessor._image_members(archive):
+                    with archive.open(info) as member:
+                        data = member.read()
+                    yield os.path.basename(info.filename), data
+
         except zipfile.BadZipFile:
             raise ValueError("File zip tidak valid atau rusak")
-        except Exception as e:
-            raise ValueError(f"Terjadi kesalahan saat mengekstrak file zip: {str(e)}")
 
     @staticmethod
     def create_zip(
@@ -0,0 +1,142 @@
+"""Benchmarks for model loading and inference precision on the serving path.
+
+Load measurements run in a fresh process so that peak RSS is not polluted by
+earlier runs.
+
+Example:
+
+    python bench_models.py load --network=pretrained_models/ffhq.pkl
+    python bench_models.py precision --network=pretrained_models/ffhq.pkl --seeds=0-15
+"""
+
+import re
+import time
+import resource
+import multiprocessing
+import click
+import numpy as np
+
+#----------------------------------------------------------------------------
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _run_in_subprocess(fn, *args):
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(fn, args)
+
+#----------------------------------------------------------------------------
+
+def _load_pickle(network, keys):
+    import torch # pylint: disable=unused-import
+    import dnnlib
+    import legacy
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    with dnnlib.util.open_url(network) as f:
+        data = legacy.load_network_pkl(f, keys=keys)
+    elapsed = time.perf_counter() - start
+    assert data['G_ema'] is not None
+    return elapsed, _peak_rss_mb() - baseline
+
+def _load_serving(network):
+    import torch # pylint: disable=unused-import
+    import serving_artifact
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    G = serving_artifact.load_generator(network)
+    elapsed = time.perf_counter() - start
+    assert G is not None
+    return elapsed, _peak_rss_mb() - baseline
+
+#----------------------------------------------------------------------------
+
+@click.group()
+def main():
+    """Benchmark model loading and inference modes."""
+
+#----------------------------------------------------------------------------
+
+@main.command('load')
+@click.option('--network', help='Network pickle or serving artifact', required=True, metavar='PATH')
+@click.option('--repeats', help='Fresh processes per mode', type=int, default=3, show_default=True)
+def bench_load(network, repeats):
+    """Compare full pickle loading against loading only G_ema."""
+    import serving_artifact
+    if serving_artifact.is_serving_artifact(network):
+        modes = {'serving artifact': (_load_serving, network)}
+    else:
+        modes = {
+            'full (G, D, G_ema)': (_load_pickle, network, None),
+            'G_ema only': (_load_pickle, network, ['G_ema']),
+        }
+
+    for name, (fn, *args) in modes.items():
+        results = [_run_in_subprocess(fn, *args) for _ in range(repeats)]
+        elapsed = min(r[0] for r in results)
+        rss = min(r[1] for r in results)
+        print(f'{name:<20s} load {elapsed:7.3f} s   peak RSS increase {rss:8.1f} MB')
+
+#----------------------------------------------------------------------------
+
+def num_range(s):
+    """Accept either a comma separated list of numbers 'a,b,c' or a range 'a-c' and return as a list of ints."""
+    m = re.match(r'^(\d+)-(\d+)$', s)
+    if m:
+        return list(range(int(m.group(1)), int(m.group(2)) + 1))
+    return [int(x) for x in s.split(',')]
+
+def _load_generator(network):
+    import dnnlib
+    import legacy
+    import serving_artifact
+    if serving_artifact.is_serving_artifact(network):
+        return serving_artifact.load_generator(network)
+    with dnnlib.util.open_url(network) as f:
+        return legacy.load_network_pkl(f, keys=['G_ema'])['G_ema']
+
+def _render(G, seeds, truncation_psi):
+    import torch
+    from app.services.precision import precision_context
+    z = torch.from_numpy(np.stack([np.random.RandomState(seed).randn(G.z_dim) for seed in seeds]))
+    c = torch.zeros([len(seeds), G.c_dim])
+    with torch.no_grad(), precision_context(G):
+        ws = G.mapping(z, c, truncation_psi=truncation_psi).float()
+        img = G.synthesis(ws, noise_mode='const')
+    return (img.float().permute(0, 2, 3, 1) * 127.5 + 128).clamp(0, 255).to(torch.uint8).numpy()
+
+@main.command('precision')
+@click.option('--network', help='Network pickle or serving artifact', required=True, metavar='PATH')
+@click.option('--seeds', help='Fixed seeds for the accuracy report', type=num_range, default='0-7', show_default=True)
+@click.option('--trunc', 'truncation_psi', help='Truncation psi', type=float, default=0.7, show_default=True)
+@click.option('--batch', help='Batch size for throughput', type=int, default=4, show_default=True)
+@click.option('--repeats', help='Timed batches per mode', type=int, default=5, show_default=True)
+def bench_precision(network, seeds, truncation_psi, batch, repeats):
+    """Report per-pixel error against fp32 and throughput for each inference precision."""
+    from app.services.precision import PRECISIONS, apply_precision
+    reference = None
+    for precision in PRECISIONS:
+        G = apply_precision(_load_generator(network).eval().requires_grad_(False), precision)
+        images = _render(G, seeds, truncation_psi).astype(np.float64)
+        if reference is None:
+            reference = images
+        err = np.abs(images - reference)
+        mse = np.mean(np.square(images - reference))
+        psnr = 10 * np.log10(255 ** 2 / mse) if mse > 0 else float('inf')
+
+        batch_seeds = list(range(batch))
+        _render(G, batch_seeds, truncation_psi) # warm-up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            _render(G, batch_seeds, truncation_psi)
+        throughput = batch * repeats / (time.perf_counter() - start)
+        print(f'{precision:<6s} mean abs err {err.mean():7.3f}   max abs err {err.max():5.0f}   PSNR {psnr:6.2f} dB   {throughput:7.2f} img/s')
+
+#----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main() # pylint: disable=no-value-for-parameter
+
+#----------------------------------------------------------------------------
@@ -0,0 +1,119 @@
+"""Micro-benchmarks and parity checks for the CPU implementations of the custom ops.
+
+Example:
+
+    python bench_ops.py upfirdn2d --batch=4 --repeats=20
+    python bench_ops.py bias-act --repeats=20
+"""
+
+import time
+import click
+import torch
+
+from torch_utils.ops import upfirdn2d
+from torch_utils.ops import bias_act
+
+#----------------------------------------------------------------------------
+
+def _timeit(fn, repeats):
+    fn() # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+def _report(name, ref_fn, fast_fn, repeats):
+    with torch.no_grad():
+        y_ref = ref_fn()
+        y_fast = fast_fn()
+        assert y_ref.shape == y_fast.shape
+        err = (y_ref - y_fast).abs().max().item()
+        t_ref = _timeit(ref_fn, repeats)
+        t_fast = _timeit(fast_fn, repeats)
+    print(f'{name:<40s} ref {t_ref * 1e3:8.3f} ms   cpu {t_fast * 1e3:8.3f} ms   speedup {t_ref / t_fast:5.2f}x   max err {err:.2e}')
+    return err
+
+#----------------------------------------------------------------------------
+
+@click.group()
+def main():
+    """Benchmark CPU op implementations against the reference implementations."""
+
+#----------------------------------------------------------------------------
+
+@main.command('upfirdn2d')
+@click.option('--batch', help='Batch size', type=int, default=1, show_default=True)
+@click.option('--repeats', help='Timed repetitions per case', type=int, default=20, show_default=True)
+@click.option('--tol', help='Maximum allowed absolute error', type=float, default=1e-4, show_default=True)
+def bench_upfirdn2d(batch, repeats, tol):
+    """Compare impl='cpu' against impl='ref' on StyleGAN2 synthesis shapes."""
+    f = upfirdn2d.setup_filter([1, 3, 3, 1])
+    errors = []
+    for res, channels in [(16, 512), (64, 512), (128, 256), (256, 64), (512, 3)]:
+        x = torch.randn([batch, channels, res, res])
+        errors.append(_report(
+            f'filter2d        {channels:4d}x{res}x{res}',
+            lambda: upfirdn2d.filter2d(x, f, padding=1, impl='ref'),
+            lambda: upfirdn2d.filter2d(x, f, padding=1, impl='cpu'),
+            repeats,
+        ))
+        errors.append(_report(
+            f'upsample2d      {channels:4d}x{res // 2}x{res // 2}',
+            lambda: upfirdn2d.upsample2d(x[:, :, :res // 2, :res // 2], f, impl='ref'),
+            lambda: upfirdn2d.upsample2d(x[:, :, :res // 2, :res // 2], f, impl='cpu'),
+            repeats,
+        ))
+        errors.append(_report(
+            f'downsample2d    {channels:4d}x{res}x{res}',
+            lambda: upfirdn2d.downsample2d(x, f, impl='ref'),
+            lambda: upfirdn2d.downsample2d(x, f, impl='cpu'),
+            repeats,
+        ))
+    if max(errors) > tol:
+        raise click.ClickException(f'Max error {max(errors):.2e} exceeds tolerance {tol:.2e}')
+
+#----------------------------------------------------------------------------
+
+@main.command('bias-act')
+@click.option('--batch', help='Batch size', type=int, default=1, show_default=True)
+@click.option('--repeats', help='Timed repetitions per case', type=int, default=20, show_default=True)
+@click.option('--tol', help='Maximum allowed absolute error', type=float, default=1e-5, show_default=True)
+def bench_bias_act(batch, repeats, tol):
+    """Check impl='cpu' against impl='ref' for every activation, then benchmark synthesis shapes."""
+    errors = []
+    x = torch.randn([3, 8, 5, 7])
+    for act in bias_act.activation_funcs:
+        for b in [None, torch.randn([8])]:
+            for gain, clamp in [(None, None), (1, None), (0.5, 0.25), (None, 256)]:
+                kwargs = dict(b=b, act=act, gain=gain, clamp=clamp)
+                with torch.no_grad():
+                    err = (bias_act.bias_act(x, impl='ref', **kwargs) - bias_act.bias_act(x, impl='cpu', **kwargs)).abs().max().item()
+                errors.append(err)
+                if err > tol:
+                    print(f'{act:<10s} bias={b is not None} gain={gain} clamp={clamp} max err {err:.2e}')
+    print(f'parity: {len(errors)} cases, max err {max(errors):.2e}')
+
+    for res, channels in [(16, 512), (64, 512), (256, 128), (1024, 32)]:
+        x = torch.randn([batch, channels, res, res])
+        b = torch.randn([channels])
+        errors.append(_report(
+            f'lrelu clamp=256 {channels:4d}x{res}x{res}',
+            lambda: bias_act.bias_act(x, b, act='lrelu', clamp=256, impl='ref'),
+            lambda: bias_act.bias_act(x, b, act='lrelu', clamp=256, impl='cpu'),
+            repeats,
+        ))
+        errors.append(_report(
+            f'linear          {channels:4d}x{res}x{res}',
+            lambda: bias_act.bias_act(x, b, impl='ref'),
+            lambda: bias_act.bias_act(x, b, impl='cpu'),
+            repeats,
+        ))
+    if max(errors) > tol:
+        raise click.ClickException(f'Max error {max(errors):.2e} exceeds tolerance {tol:.2e}')
+
+#----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main() # pylint: disable=no-value-for-parameter
+
+#----------------------------------------------------------------------------
@@ -17,16 +17,25 @@ from torch_utils import misc
 
 #----------------------------------------------------------------------------
 
-def load_network_pkl(f, force_fp16=False):
-    data = _LegacyUnpickler(f).load()
+def load_network_pkl(f, force_fp16=False, keys=None):
+    """Load a network pickle (native or legacy TensorFlow).
+
+    If `keys` is given, e.g. `keys=['G_ema']`, only those entries are
+    reconstructed and returned. Persistent objects and tensor storages
+    belonging to the other entries are never materialized, and legacy
+    TensorFlow networks that are not requested are not converted.
+    """
+    if keys is None:
+        data = _LegacyUnpickler(f).load()
+    else:
+        keys = list(keys)
+        data = _SelectiveUnpickler(f).load()
 
     # Legacy TensorFlow pickle => convert.
     if isinstance(data, tuple) and len(data) == 3 and all(isinstance(net, _TFNetworkStub) for net in data):
         tf_G, tf_D, tf_Gs = data
-        G = convert_tf_generator(tf_G)
-        D = convert_tf_discriminator(tf_D)
-        G_ema = convert_tf_generator(tf_Gs)
-        data = dict(G=G, D=D, G_ema=G_ema)
+        tf_nets = dict(G=(convert_tf_generator, tf_G), D=(convert_tf_discriminator, tf_D), G_ema=(convert_tf_generator, tf_Gs))
+        data = {key: convert(tf_net) for key, (convert, tf_net) in tf_nets.items() if keys is None or key in keys}
 
     # Add missing fields.
     if 'training_set_kwargs' not in data:
@@ -34,16 +43,27 @@ def load_network_pkl(f, force_fp16=False):
     if 'augment_pipe' not in data:
         data['augment_pipe'] = None
 
+    # Keep only the requested entries.
+    if keys is not None:
+        missing = [key for key in keys if key not in data]
+        if missing:
+            raise KeyError(f'Network pickle does not contain {missing}')
+        data = {key: _materialize(data[key], dict()) for key in keys}
+
     # Validate contents.
-    assert isinstance(data['G'], torch.nn.Module)
-    assert isinstance(data['D'], torch.nn.Module)
-    assert isinstance(data['G_ema'], torch.nn.Module)
-    assert isinstance(data['training_set_kwargs'], (dict, type(None)))
-    assert isinstance(data['augment_pipe'], (torch.nn.Module, type(None)))
+    for key in ['G', 'D', 'G_ema']:
+        if key in data:
+            assert isinstance(data[key], torch.nn.Module)
+    if 'training_set_kwargs' in data:
+        assert isinstance(data['training_set_kwargs'], (dict, type(None)))
+    if 'augment_pipe' in data:
+        assert isinstance(data['augment_pipe'], (torch.nn.Module, type(None)))
 
     # Force FP16.
     if force_fp16:
         for key in ['G', 'D', 'G_ema']:
+            if key not in data:
+                continue
             old = data[key]
             kwargs = copy.deepcopy(old.init_kwargs)
             if key.startswith('G'):
@@ -61,6 +81,59 @@ def load_network_pkl(f, force_fp16=False):
 
 #----------------------------------------------------------------------------
 
+metadata_fields = ['z_dim', 'c_dim', 'w_dim', 'num_ws', 'img_resolution', 'img_channels']
+
+def load_network_metadata(f, key='G_ema'):
+    """Read the basic shape of one network in a pickle without constructing it.
+
+    Returns a dict with z_dim, c_dim, w_dim, num_ws, img_resolution,
+    img_channels and the approximate size of its tensor data in bytes.
+    """
+    data = _SelectiveUnpickler(f).load()
+
+    # Legacy TensorFlow pickle => read static kwargs.
+    if isinstance(data, tuple) and len(data) == 3 and all(isinstance(net, _TFNetworkStub) for net in data):
+        tf_net = dict(G=data[0], D=data[1], G_ema=data[2])[key]
+        tf_kwargs = tf_net.static_kwargs
+        resolution = tf_kwargs.get('resolution', 1024)
+        return dict(
+            z_dim=tf_kwargs.get('latent_size', 512),
+            c_dim=tf_kwargs.get('label_size', 0),
+            w_dim=tf_kwargs.get('dlatent_size', 512),
+            num_ws=int(np.log2(resolution)) * 2 - 2,
+            img_resolution=resolution,
+            img_channels=tf_kwargs.get('num_channels', 3),
+            nbytes=sum(value.nbytes for value in _collect_tf_params(tf_net).values() if isinstance(value, np.ndarray)),
+        )
+
+    net = data[key]
+    if not isinstance(net, _DeferredCall):
+        raise ValueError(f'Network pickle entry {key} is not a persistent object')
+    state = net.args[0]['state']
+    metadata = {name: state.get(name) for name in metadata_fields}
+
+    # Approximate tensor data size by the serialized storages reachable from the network.
+    storages = dict()
+    def recurse(obj):
+        if id(obj) in storages:
+            return
+        if isinstance(obj, _DeferredCall):
+            storages[id(obj)] = len(obj.args[0]) if obj.func is torch.storage._load_from_bytes else 0 # pylint: disable=protected-access
+            recurse(obj.args)
+        elif isinstance(obj, (tuple, list)):
+            for value in obj:
+                recurse(value)
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                recurse(value)
+        elif isinstance(obj, torch.nn.Module):
+            recurse(obj.__dict__)
+    recurse(net)
+    metadata['nbytes'] = sum(storages.values())
+    return metadata
+
+#----------------------------------------------------------------------------
+
 class _TFNetworkStub(dnnlib.EasyDict):
     pass
 
@@ -70,6 +143,75 @@ class _LegacyUnpickler(pickle.Unpickler):
             return _TFNetworkStub
         return super().find_class(module, name)
 
+#----------------------------------------------------------------------------
+# Selective unpickling: persistent objects and tensor storages are recorded
+# as deferred calls while reading the pickle, and only the entries that are
+# actually requested are materialized afterwards.
+
+_deferred_classes = {
+    ('torch_utils.persistence', '_reconstruct_persistent_obj'),
+    ('torch.storage', '_load_from_bytes'),
+    ('torch._utils', '_rebuild_tensor'),
+    ('torch._utils', '_rebuild_tensor_v2'),
+    ('torch._utils', '_rebuild_parameter'),
+    ('torch._utils', '_rebuild_parameter_with_state'),
+    ('torch._tensor', '_rebuild_from_type_v2'),
+}
+
+class _DeferredCall:
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.state = None
+
+    def __setstate__(self, state):
+        self.state = state
+
+class _DeferredFunc:
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, *args):
+        return _DeferredCall(self.func, args)
+
+class _SelectiveUnpickler(_LegacyUnpickler):
+    def find_class(self, module, name):
+        obj = super().find_class(module, name)
+        if (module, name) in _deferred_classes:
+            return _DeferredFunc(obj)
+        return obj
+
+def _materialize(obj, memo):
+    if id(obj) in memo:
+        return memo[id(obj)]
+
+    if isinstance(obj, _DeferredCall):
+        result = obj.func(*_materialize(obj.args, memo))
+        if obj.state is not None:
+            state = _materialize(obj.state, memo)
+            setstate = getattr(result, '__setstate__', None)
+            if callable(setstate):
+                setstate(state) # pylint: disable=not-callable
+            else:
+                result.__dict__.update(state)
+    elif isinstance(obj, tuple):
+        result = tuple(_materialize(value, memo) for value in obj)
+    elif isinstance(obj, list):
+        result = memo[id(obj)] = []
+        result.extend(_materialize(value, memo) for value in obj)
+    elif isinstance(obj, dict):
+        result = memo[id(obj)] = obj
+        for key, value in list(obj.items()):
+            obj[key] = _materialize(value, memo)
+    elif isinstance(obj, torch.nn.Module):
+        result = memo[id(obj)] = obj
+        _materialize(obj.__dict__, memo)
+    else:
+        result = obj
+
+    memo[id(obj)] = result
+    return result
+
 #----------------------------------------------------------------------------
 
 def _collect_tf_params(tf_net):
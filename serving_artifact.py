@@ -0,0 +1,175 @@
+"""Serving artifact format for StyleGAN2 generators.
+
+A serving artifact is a directory `<name>.serving/` that contains:
+
+    config.json   Generator class name, constructor arguments, and the offset,
+                  shape and dtype of every parameter and buffer in weights.bin.
+    module.py     Source code of the Python module defining the generator class,
+                  as captured by `torch_utils.persistence`.
+    weights.bin   Raw tensor data (including the precomputed `mapping.w_avg`),
+                  concatenated and 64-byte aligned so it can be memory-mapped.
+
+Loading an artifact does not unpickle anything and does not run the legacy
+TensorFlow conversion. Tensors are views into a copy-on-write memory map of
+weights.bin, so pages are shared between processes until written to. The
+generator module source is imported at most once per process. If the same
+source is already loaded, for example by an earlier pickle, the import is
+skipped.
+"""
+
+import os
+import json
+import click
+import numpy as np
+import torch
+import dnnlib
+import legacy
+from torch_utils import misc
+from torch_utils import persistence
+
+#----------------------------------------------------------------------------
+
+SERVING_SUFFIX = '.serving'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+def is_serving_artifact(path):
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, 'config.json'))
+
+#----------------------------------------------------------------------------
+
+def _jsonable(obj):
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, (np.integer, np.floating)):
+        return obj.item()
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    raise TypeError(f'Cannot store constructor argument of type {type(obj).__name__} in a serving artifact')
+
+def save_generator(G, dest):
+    """Write the generator `G` (a persistent `torch.nn.Module`) as a serving artifact."""
+    assert persistence.is_persistent(G)
+    os.makedirs(dest, exist_ok=True)
+
+    tensors = []
+    offset = 0
+    with open(os.path.join(dest, 'weights.bin'), 'wb') as f:
+        for name, tensor in misc.named_params_and_buffers(G):
+            array = tensor.detach().cpu().contiguous().numpy()
+            padding = -offset % ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            f.write(array.tobytes())
+            tensors.append(dict(name=name, dtype=array.dtype.name, shape=list(array.shape), offset=offset))
+            offset += array.nbytes
+
+    with open(os.path.join(dest, 'module.py'), 'w') as f:
+        f.write(type(G)._orig_module_src)
+
+    config = dict(
+        format_version=FORMAT_VERSION,
+        class_name=type(G)._orig_class_name,
+        init_args=_jsonable(G.init_args),
+        init_kwargs=_jsonable(G.init_kwargs),
+        z_dim=G.z_dim,
+        c_dim=G.c_dim,
+        w_dim=G.w_dim,
+        num_ws=G.num_ws,
+        img_resolution=G.img_resolution,
+        img_channels=G.img_channels,
+        tensors=tensors,
+    )
+    with open(os.path.join(dest, 'config.json'), 'w') as f:
+        json.dump(config, f, indent=2)
+    return dest
+
+#----------------------------------------------------------------------------
+
+def _construct(cls, config):
+    # Build the module structure on the meta device to skip random weight init (PyTorch 2.0+).
+    try:
+        with torch.device('meta'):
+            return cls(*config['init_args'], **config['init_kwargs'])
+    except Exception: # pylint: disable=broad-except
+        return cls(*config['init_args'], **config['init_kwargs'])
+
+def _assign_tensors(G, tensors):
+    for module_name, module in G.named_modules():
+        prefix = module_name + '.' if module_name else ''
+        for name, param in list(module._parameters.items()): # pylint: disable=protected-access
+            if param is not None:
+                module._parameters[name] = torch.nn.Parameter(tensors.pop(prefix + name), requires_grad=False) # pylint: disable=protected-access
+        for name, buf in list(module._buffers.items()): # pylint: disable=protected-access
+            if buf is not None:
+                module._buffers[name] = tensors.pop(prefix + name) # pylint: disable=protected-access
+    if tensors:
+        raise ValueError(f'Serving artifact contains unknown tensors: {sorted(tensors)[:5]}')
+
+def _has_meta_tensors(G):
+    for module in G.modules():
+        for value in list(module.__dict__.values()) + misc.params_and_buffers(module):
+            if isinstance(value, torch.Tensor) and value.is_meta:
+                return True
+    return False
+
+def load_generator(path, device=torch.device('cpu')):
+    """Build a generator from a serving artifact without unpickling."""
+    with open(os.path.join(path, 'config.json')) as f:
+        config = json.load(f)
+    if config.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f'Unsupported serving artifact version: {config.get("format_version")}')
+    config['init_kwargs'] = dnnlib.EasyDict(config['init_kwargs'])
+
+    with open(os.path.join(path, 'module.py')) as f:
+        module = persistence._src_to_module(f.read()) # pylint: disable=protected-access
+    cls = persistence.persistent_class(module.__dict__[config['class_name']])
+
+    weights = np.memmap(os.path.join(path, 'weights.bin'), mode='c')
+    def load_tensors():
+        tensors = dict()
+        for spec in config['tensors']:
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            array = weights[spec['offset'] : spec['offset'] + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+            tensors[spec['name']] = torch.from_numpy(array)
+        return tensors
+
+    G = _construct(cls, config)
+    _assign_tensors(G, load_tensors())
+    if _has_meta_tensors(G):
+        G = cls(*config['init_args'], **config['init_kwargs'])
+        _assign_tensors(G, load_tensors())
+
+    return G.eval().requires_grad_(False).to(device)
+
+#----------------------------------------------------------------------------
+
+@click.command()
+@click.option('--source', help='Input network pickle (native or legacy TensorFlow)', required=True, metavar='PATH')
+@click.option('--dest', help='Output serving artifact directory', metavar='DIR')
+def convert_to_serving(source, dest):
+    """Convert a network pickle into a serving artifact containing only G_ema.
+
+    Example:
+
+    \b
+    python serving_artifact.py --source=pretrained_models/ffhq.pkl
+    """
+    if dest is None:
+        dest = os.path.splitext(source)[0] + SERVING_SUFFIX
+    print(f'Loading "{source}"...')
+    with dnnlib.util.open_url(source) as f:
+        G = legacy.load_network_pkl(f, keys=['G_ema'])['G_ema']
+    print(f'Saving "{dest}"...')
+    save_generator(G, dest)
+    print('Done.')
+
+#----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    convert_to_serving() # pylint: disable=no-value-for-parameter
+
+#----------------------------------------------------------------------------
@@ -0,0 +1,46 @@
+import itertools
+
+import torch
+
+from app.services.compiler import compile_synthesis
+
+
+class _Synthesis(torch.nn.Module):
+    def __init__(self, num_ws: int, w_dim: int):
+        super().__init__()
+        self.layer = torch.nn.Sequential(torch.nn.Linear(w_dim, 8))
+        self.register_buffer("noise_const", torch.randn([8]))
+
+    def forward(self, ws, noise_mode='random'):
+        return self.layer(ws.mean(dim=1)) + self.noise_const
+
+
+class _Generator(torch.nn.Module):
+    def __init__(self, num_ws: int = 4, w_dim: int = 16):
+        super().__init__()
+        self.num_ws = num_ws
+        self.w_dim = w_dim
+        self.synthesis = _Synthesis(num_ws, w_dim)
+
+
+def _data_ptrs(module) -> set:
+    return {tensor.data_ptr() for tensor in itertools.chain(module.parameters(), module.buffers())}
+
+
+def test_compiled_modules_share_synthesis_weights(tmp_path):
+    G = _Generator().eval()
+    expected = _data_ptrs(G.synthesis)
+
+    traced = compile_synthesis(G, "toy", [1, 2], str(tmp_path))
+    # Pemanggilan kedua memuat artifact dari disk lewat torch.jit.load
+    loaded = compile_synthesis(G, "toy", [1, 2], str(tmp_path))
+
+    for compiled in (traced, loaded):
+        assert sorted(compiled.modules) == [1, 2]
+        for module in compiled.modules.values():
+            assert _data_ptrs(module) == expected
+
+    ws = torch.randn([2, G.num_ws, G.w_dim])
+    with torch.no_grad():
+        G.synthesis.layer[0].bias.add_(1)
+        torch.testing.assert_close(loaded(ws), G.synthesis(ws, noise_mode='const'))
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app import config
+from app.routers import health
+from app.services import warmup
+
+
+@pytest.fixture
+def warmup_env(monkeypatch):
+    warmup.warmup_state.__init__()
+    monkeypatch.setattr(config, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(config, "WARMUP_MODELS", ["a.pkl", "b.pkl"])
+    monkeypatch.setattr(config, "WARMUP_BATCH_SIZES", [1])
+    monkeypatch.setattr(config, "WARMUP_FINGERPRINT_BATCH_SIZES", [])
+    monkeypatch.setattr(config, "WARMUP_MAX_ITERATIONS", 1)
+    monkeypatch.setattr(config, "WARMUP_RETRIES", 2)
+    monkeypatch.setattr(config, "WARMUP_RETRY_BACKOFF", 0)
+
+    async def run_everywhere(fn, *args, **kwargs):
+        return [fn(*args, **kwargs)]
+
+    monkeypatch.setattr(warmup, "run_everywhere", run_everywhere)
+    yield warmup.warmup_state
+    warmup.warmup_state.__init__()
+
+
+def _fail_for(monkeypatch, failures: dict):
+    """failures: nama model -> jumlah percobaan pertama yang gagal"""
+    calls = {}
+
+    def warmup_model(model_name, batch_size):
+        calls[model_name] = calls.get(model_name, 0) + 1
+        if calls[model_name] <= failures.get(model_name, 0):
+            raise RuntimeError(f"gagal memuat {model_name}")
+
+    monkeypatch.setattr(warmup.stylegan, "warmup_model", warmup_model)
+    return calls
+
+
+def test_transient_failure_is_retried(warmup_env, monkeypatch):
+    calls = _fail_for(monkeypatch, {"a.pkl": 1})
+
+    state = asyncio.run(warmup.run_warmup())
+
+    assert state.status == "ready"
+    assert state.errors == []
+    assert calls == {"a.pkl": 2, "b.pkl": 1}
+
+
+def test_partial_failure_is_degraded_but_ready(warmup_env, monkeypatch):
+    calls = _fail_for(monkeypatch, {"a.pkl": 10})
+
+    state = asyncio.run(warmup.run_warmup())
+
+    assert state.status == "degraded"
+    assert state.ready
+    assert calls["a.pkl"] == config.WARMUP_RETRIES + 1
+    assert [error["target"] for error in state.errors] == ["a.pkl"]
+    assert asyncio.run(health.ready()).status_code == 200
+
+
+def test_total_failure_is_not_ready(warmup_env, monkeypatch):
+    _fail_for(monkeypatch, {"a.pkl": 10, "b.pkl": 10})
+
+    state = asyncio.run(warmup.run_warmup())
+
+    assert state.status == "failed"
+    assert not state.ready
+    assert len(state.errors) == 2
+    assert asyncio.run(health.ready()).status_code == 503
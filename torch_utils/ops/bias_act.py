@@ -38,6 +38,8 @@ _inited = False
 _plugin = None
 _null_tensor = torch.empty([0])
 
+cpu_fallback = True     # Use the fused CPU implementation for CPU tensors when impl='cuda'.
+
 def _init():
     global _inited, _plugin
     if not _inited:
@@ -77,15 +79,17 @@ def bias_act(x, b=None, dim=1, act='linear', alpha=None, gain=None, clamp=None,
                 If unsure, consider specifying 1.
         clamp:  Clamp the output values to `[-clamp, +clamp]`, or `None` to disable
                 the clamping (default).
-        impl:   Name of the implementation to use. Can be `"ref"` or `"cuda"` (default).
+        impl:   Name of the implementation to use. Can be `"ref"`, `"cpu"` or `"cuda"` (default).
 
     Returns:
         Tensor of the same shape and datatype as `x`.
     """
     assert isinstance(x, torch.Tensor)
-    assert impl in ['ref', 'cuda']
+    assert impl in ['ref', 'cpu', 'cuda']
     if impl == 'cuda' and x.device.type == 'cuda' and _init():
         return _bias_act_cuda(dim=dim, act=act, alpha=alpha, gain=gain, clamp=clamp).apply(x, b)
+    if impl == 'cpu' or (impl == 'cuda' and cpu_fallback and x.device.type == 'cpu'):
+        return _bias_act_cpu(x=x, b=b, dim=dim, act=act, alpha=alpha, gain=gain, clamp=clamp)
     return _bias_act_ref(x=x, b=b, dim=dim, act=act, alpha=alpha, gain=gain, clamp=clamp)
 
 #----------------------------------------------------------------------------
@@ -124,6 +128,65 @@ def _bias_act_ref(x, b=None, dim=1, act='linear', alpha=None, gain=None, clamp=N
 
 #----------------------------------------------------------------------------
 
+_inplace_funcs = {
+    'linear':   lambda x, alpha: x,
+    'relu':     lambda x, alpha: x.relu_(),
+    'lrelu':    lambda x, alpha: torch.nn.functional.leaky_relu_(x, alpha),
+    'tanh':     lambda x, alpha: x.tanh_(),
+    'sigmoid':  lambda x, alpha: x.sigmoid_(),
+    'elu':      lambda x, alpha: torch.nn.functional.elu_(x),
+    'selu':     lambda x, alpha: torch.nn.functional.selu_(x),
+    'softplus': lambda x, alpha: torch.nn.functional.softplus(x),
+    'swish':    lambda x, alpha: torch.nn.functional.silu(x, inplace=True),
+}
+
+@misc.profiled_function
+def _bias_act_cpu(x, b=None, dim=1, act='linear', alpha=None, gain=None, clamp=None):
+    """Fused CPU implementation of `bias_act()` for inference.
+
+    Allocates a single output tensor for the bias add and applies the activation,
+    gain and clamp to it in place, instead of materializing an intermediate tensor
+    per step. Falls back to the reference implementation when gradients are needed.
+    """
+    assert isinstance(x, torch.Tensor)
+    assert clamp is None or clamp >= 0
+    if torch.is_grad_enabled() and (x.requires_grad or (b is not None and b.requires_grad)):
+        return _bias_act_ref(x=x, b=b, dim=dim, act=act, alpha=alpha, gain=gain, clamp=clamp)
+    spec = activation_funcs[act]
+    alpha = float(alpha if alpha is not None else spec.def_alpha)
+    gain = float(gain if gain is not None else spec.def_gain)
+    clamp = float(clamp if clamp is not None else -1)
+
+    # Nothing to do => return the input as-is, like the reference implementation.
+    if b is None and act == 'linear' and gain == 1 and clamp < 0:
+        return x
+
+    # Add bias into a fresh output tensor; all remaining steps operate in place.
+    if b is not None:
+        assert isinstance(b, torch.Tensor) and b.ndim == 1
+        assert 0 <= dim < x.ndim
+        assert b.shape[0] == x.shape[dim]
+        y = torch.add(x, b.reshape([-1 if i == dim else 1 for i in range(x.ndim)]))
+    else:
+        y = x.clone()
+
+    # ReLU followed by clamp => a single clamp to [0, clamp / gain] before scaling.
+    if act == 'relu' and gain > 0:
+        y.clamp_(min=0, max=(clamp / gain if clamp >= 0 else None))
+        if gain != 1:
+            y.mul_(gain)
+        return y
+
+    # Evaluate activation function, scale by gain, and clamp.
+    y = _inplace_funcs[act](y, alpha)
+    if gain != 1:
+        y.mul_(gain)
+    if clamp >= 0:
+        y.clamp_(-clamp, clamp)
+    return y
+
+#----------------------------------------------------------------------------
+
 _bias_act_cuda_cache = dict()
 
 def _bias_act_cuda(dim=1, act='linear', alpha=None, gain=None, clamp=None):
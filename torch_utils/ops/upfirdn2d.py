@@ -23,6 +23,8 @@ from . import conv2d_gradfix
 _inited = False
 _plugin = None
 
+cpu_fallback = True     # Use the vectorized CPU implementation for CPU tensors when impl='cuda'.
+
 def _init():
     global _inited, _plugin
     if not _inited:
@@ -152,15 +154,17 @@ def upfirdn2d(x, f, up=1, down=1, padding=0, flip_filter=False, gain=1, impl='cu
                      (default: 0).
         flip_filter: False = convolution, True = correlation (default: False).
         gain:        Overall scaling factor for signal magnitude (default: 1).
-        impl:        Implementation to use. Can be `'ref'` or `'cuda'` (default: `'cuda'`).
+        impl:        Implementation to use. Can be `'ref'`, `'cpu'` or `'cuda'` (default: `'cuda'`).
 
     Returns:
         Tensor of the shape `[batch_size, num_channels, out_height, out_width]`.
     """
     assert isinstance(x, torch.Tensor)
-    assert impl in ['ref', 'cuda']
+    assert impl in ['ref', 'cpu', 'cuda']
     if impl == 'cuda' and x.device.type == 'cuda' and _init():
         return _upfirdn2d_cuda(up=up, down=down, padding=padding, flip_filter=flip_filter, gain=gain).apply(x, f)
+    if impl == 'cpu' or (impl == 'cuda' and cpu_fallback and x.device.type == 'cpu'):
+        return _upfirdn2d_cpu(x, f, up=up, down=down, padding=padding, flip_filter=flip_filter, gain=gain)
     return _upfirdn2d_ref(x, f, up=up, down=down, padding=padding, flip_filter=flip_filter, gain=gain)
 
 #----------------------------------------------------------------------------
@@ -209,6 +213,100 @@ def _upfirdn2d_ref(x, f, up=1, down=1, padding=0, flip_filter=False, gain=1):
 
 #----------------------------------------------------------------------------
 
+def _correlate2d(x, h, offset, count, stride):
+    """Depthwise correlation `y[ty, tx] = sum h[sy, sx] * x[ty * stride_y + sy + offset_y, tx * stride_x + sx + offset_x]`
+    for `ty in [0, count_y)` and `tx in [0, count_x)`, treating out-of-range pixels as zeros.
+    """
+    num_channels = x.shape[1]
+    pad = []
+    for dim, taps, o, n, st in [(3, h.shape[1], offset[1], count[1], stride[1]), (2, h.shape[0], offset[0], count[0], stride[0])]:
+        size = x.shape[dim]
+        end = o + (n - 1) * st + taps
+        crop0, crop1 = max(o, 0), max(size - end, 0)
+        if n <= 0 or crop0 + crop1 >= size:
+            return x.new_zeros([x.shape[0], num_channels, count[0], count[1]])
+        x = x.narrow(dim, crop0, size - crop0 - crop1)
+        pad += [max(-o, 0), max(end - size, 0)]
+    if any(pad):
+        x = torch.nn.functional.pad(x, pad)
+    w = h[np.newaxis, np.newaxis].repeat([num_channels, 1, 1, 1])
+    return conv2d_gradfix.conv2d(input=x, weight=w, stride=list(stride), groups=num_channels)
+
+def _upfirdn2d_strided(x, g, up, down, padding):
+    """Upfirdn of `x` with the correlation kernel `g` of shape `[kernel_height, kernel_width]`
+    using strided depthwise convolutions. Upsampling is done by a transposed convolution,
+    which only evaluates the filter taps that line up with real input pixels (polyphase),
+    and downsampling by a strided convolution, which skips the discarded outputs.
+    """
+    upx, upy = up
+    downx, downy = down
+    padx0, padx1, pady0, pady1 = padding
+    num_channels = x.shape[1]
+    kh, kw = g.shape
+    out_height = x.shape[2] * upy + pady0 + pady1 - kh + 1
+    out_width = x.shape[3] * upx + padx0 + padx1 - kw + 1
+    assert out_height >= 1 and out_width >= 1
+
+    # No upsampling => a single strided convolution.
+    if upx == 1 and upy == 1:
+        count = [(out_height - 1) // downy + 1, (out_width - 1) // downx + 1]
+        return _correlate2d(x, g, offset=[-pady0, -padx0], count=count, stride=[downy, downx])
+
+    # Upsampling => transposed convolution, then adjust padding.
+    px0 = padx0 - (kw - 1)
+    px1 = padx1 - (kw - upx)
+    py0 = pady0 - (kh - 1)
+    py1 = pady1 - (kh - upy)
+    pxt = max(min(-px0, -px1), 0)
+    pyt = max(min(-py0, -py1), 0)
+    w = g.flip([0, 1])[np.newaxis, np.newaxis].repeat([num_channels, 1, 1, 1])
+    x = conv2d_gradfix.conv_transpose2d(input=x, weight=w, stride=[upy, upx], padding=[pyt, pxt], groups=num_channels)
+    # Pad before cropping so that a crop larger than one side of the result still works.
+    pad = [px0 + pxt, px1 + pxt, py0 + pyt, py1 + pyt]
+    if any(p > 0 for p in pad):
+        x = torch.nn.functional.pad(x, [max(p, 0) for p in pad])
+    if any(p < 0 for p in pad):
+        x = torch.nn.functional.pad(x, [min(p, 0) for p in pad])
+    return x[:, :, ::downy, ::downx]
+
+@misc.profiled_function
+def _upfirdn2d_cpu(x, f, up=1, down=1, padding=0, flip_filter=False, gain=1):
+    """Faster CPU implementation of `upfirdn2d()` using standard PyTorch ops.
+
+    Upsampling uses transposed convolutions instead of zero insertion, and
+    downsampling uses strided convolutions instead of discarding computed pixels.
+    """
+    # Validate arguments.
+    assert isinstance(x, torch.Tensor) and x.ndim == 4
+    if f is None:
+        f = torch.ones([1, 1], dtype=torch.float32, device=x.device)
+    assert isinstance(f, torch.Tensor) and f.ndim in [1, 2]
+    assert f.dtype == torch.float32 and not f.requires_grad
+    upx, upy = _parse_scaling(up)
+    downx, downy = _parse_scaling(down)
+    padx0, padx1, pady0, pady1 = _parse_padding(padding)
+
+    # Cropping away more than the whole upsampled input is only defined by the slicing in the reference.
+    if x.shape[3] * upx + padx0 + padx1 < 0 or x.shape[2] * upy + pady0 + pady1 < 0:
+        return _upfirdn2d_ref(x, f, up=up, down=down, padding=padding, flip_filter=flip_filter, gain=gain)
+
+    # Setup filter.
+    f = f * (gain ** (f.ndim / 2))
+    f = f.to(x.dtype)
+    if not flip_filter:
+        f = f.flip(list(range(f.ndim)))
+
+    # 2D filter => single pass.
+    if f.ndim == 2:
+        return _upfirdn2d_strided(x, f, up=[upx, upy], down=[downx, downy], padding=[padx0, padx1, pady0, pady1])
+
+    # Separable filter => horizontal pass followed by vertical pass.
+    x = _upfirdn2d_strided(x, f.unsqueeze(0), up=[upx, 1], down=[downx, 1], padding=[padx0, padx1, 0, 0])
+    x = _upfirdn2d_strided(x, f.unsqueeze(1), up=[1, upy], down=[1, downy], padding=[0, 0, pady0, pady1])
+    return x
+
+#----------------------------------------------------------------------------
+
 _upfirdn2d_cuda_cache = dict()
 
 def _upfirdn2d_cuda(up=1, down=1, padding=0, flip_filter=False, gain=1):
@@ -288,7 +386,7 @@ def filter2d(x, f, padding=0, flip_filter=False, gain=1, impl='cuda'):
                      (default: 0).
         flip_filter: False = convolution, True = correlation (default: False).
         gain:        Overall scaling factor for signal magnitude (default: 1).
-        impl:        Implementation to use. Can be `'ref'` or `'cuda'` (default: `'cuda'`).
+        impl:        Implementation to use. Can be `'ref'`, `'cpu'` or `'cuda'` (default: `'cuda'`).
 
     Returns:
         Tensor of the shape `[batch_size, num_channels, out_height, out_width]`.
@@ -326,7 +424,7 @@ def upsample2d(x, f, up=2, padding=0, flip_filter=False, gain=1, impl='cuda'):
                      (default: 0).
         flip_filter: False = convolution, True = correlation (default: False).
         gain:        Overall scaling factor for signal magnitude (default: 1).
-        impl:        Implementation to use. Can be `'ref'` or `'cuda'` (default: `'cuda'`).
+        impl:        Implementation to use. Can be `'ref'`, `'cpu'` or `'cuda'` (default: `'cuda'`).
 
     Returns:
         Tensor of the shape `[batch_size, num_channels, out_height, out_width]`.
@@ -365,7 +463,7 @@ def downsample2d(x, f, down=2, padding=0, flip_filter=False, gain=1, impl='cuda'
                      (default: 0).
         flip_filter: False = convolution, True = correlation (default: False).
         gain:        Overall scaling factor for signal magnitude (default: 1).
-        impl:        Implementation to use. Can be `'ref'` or `'cuda'` (default: `'cuda'`).
+        impl:        Implementation to use. Can be `'ref'`, `'cpu'` or `'cuda'` (default: `'cuda'`).
 
     Returns:
         Tensor of the shape `[batch_size, num_channels, out_height, out_width]`.